@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the Auth API (wsgi:app).
+
+gevent workers let a single process interleave many auth requests while
+others wait on MongoDB, password hashing or SMTP.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2))
+worker_class = "gevent"
+worker_connections = 1000
+
+# Import the app (and its services) once in the master; workers share it via fork CoW
+preload_app = True
+
+# Log requests to stdout for visibility
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """
+    Give each worker its own MongoDB pool; sockets must not be shared across a fork.
+    The master never connects (AuthService.db is lazy); this only guards against anything
+    that touched Mongo during preload. Each worker connects and bootstraps indexes on first use.
+    """
+    from src import api
+    from src.database.db_connection import reset_client
+
+    reset_client()
+    api.auth_service.db = None
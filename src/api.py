@@ -1,18 +1,108 @@
+import math
+import threading
+import time
+from cachetools import TTLCache
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from src.auth_service import AuthService
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from gevent import monkey
+    from gevent.pool import Group, Pool
+    GEVENT_AVAILABLE = True
+except ImportError:
+    GEVENT_AVAILABLE = False
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and request.get_json)."""
+
+    def dumps(self, obj, **kwargs):
+        # Same options as the document API's provider; Flask's sort_keys/indent/default are honoured
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
 auth_service = AuthService()
 
+# Batch endpoint: ops dispatched in-process to the same AuthService methods
+BATCH_MAX_OPS = 100
+BATCH_OPS = {
+    "register": lambda p: auth_service.register_user(p),
+    "verify_email": lambda p: auth_service.verify_email(p.get('email'), p.get('otp')),
+    "resend_verification": lambda p: _resend_once(p.get('email'))[:2],
+}
+
+# Duplicate resend requests (double-clicks) within this window reuse the first result
+RESEND_DEDUP_TTL = 30
+_resend_cache = TTLCache(maxsize=4096, ttl=RESEND_DEDUP_TTL)
+_resend_lock = threading.Lock()
+
+# OTP emails are sent in the background on gevent workers; the bounded pool
+# applies back-pressure instead of letting spawns pile up without limit
+EMAIL_POOL_SIZE = 200
+_email_pool = Pool(EMAIL_POOL_SIZE) if GEVENT_AVAILABLE else None
+
+def _gevent_active():
+    """True only under a monkey-patched gevent worker; otherwise the hub never runs spawned greenlets."""
+    return GEVENT_AVAILABLE and monkey.is_module_patched('socket')
+
+def _send_otp_background(email, otp):
+    sent, msg = auth_service.send_otp_email(email, otp)
+    if not sent:
+        print(f"OTP email to {email} failed: {msg}")
+
+def _resend_once(email):
+    """
+    Resends the verification OTP at most once per email per RESEND_DEDUP_TTL (failures are not cached).
+    On gevent workers the email is only queued, so the call returns after the DB write.
+    Returns: (success, message, retry_after) - retry_after is set when a recent result was reused.
+    """
+    key = (email or '').strip().lower()
+    with _resend_lock:
+        cached = _resend_cache.get(key)
+    if cached is not None:
+        success, msg, sent_at = cached
+        retry_after = max(1, math.ceil(RESEND_DEDUP_TTL - (time.time() - sent_at)))
+        return success, msg, retry_after
+
+    success, msg, otp = auth_service.generate_and_store_otp(email)
+    if success:
+        if _gevent_active():
+            _email_pool.spawn(_send_otp_background, email, otp)
+            msg = "OTP dispatched."
+        else:
+            success, msg = auth_service.send_otp_email(email, otp)
+
+    # Only successful sends are deduplicated; failures must stay retryable
+    if success:
+        with _resend_lock:
+            _resend_cache[key] = (success, msg, time.time())
+    return success, msg, None
+
 @app.route('/register', methods=['POST'])
 def register():
-    data = request.json
+    data = request.get_json(force=True, silent=True) or {}
     success, msg = auth_service.register_user(data)
     return jsonify({"success": success, "message": msg}), 200 if success else 400
 
 @app.route('/login', methods=['POST'])
 def login():
-    data = request.json
+    data = request.get_json(force=True, silent=True) or {}
     email = data.get('email')
     password = data.get('password')
     success, msg, user = auth_service.login_user(email, password)
@@ -24,7 +114,7 @@ def login():
 
 @app.route('/verify-email', methods=['POST'])
 def verify_email():
-    data = request.json
+    data = request.get_json(force=True, silent=True) or {}
     email = data.get('email')
     otp = data.get('otp')
     success, msg = auth_service.verify_email(email, otp)
@@ -32,10 +122,46 @@ def verify_email():
 
 @app.route('/resend-verification', methods=['POST'])
 def resend_verification():
-    data = request.json
+    data = request.get_json(force=True, silent=True) or {}
     email = data.get('email')
-    success, msg = auth_service.resend_verification_otp(email)
-    return jsonify({"success": success, "message": msg}), 200 if success else 400
+    success, msg, retry_after = _resend_once(email)
+    response = jsonify({"success": success, "message": msg})
+    if retry_after:
+        response.headers['Retry-After'] = str(retry_after)
+    if not success:
+        return response, 400
+    # 202: the email is still in flight when it is sent in the background
+    return response, 202 if _gevent_active() else 200
+
+def _run_batch_op(item):
+    """Runs one {op, payload} entry and returns its result dict."""
+    if not isinstance(item, dict):
+        return {"success": False, "message": "Invalid batch entry."}
+
+    handler = BATCH_OPS.get(item.get('op'))
+    if handler is None:
+        return {"success": False, "message": f"Unknown op: {item.get('op')}"}
+
+    try:
+        success, msg = handler(item.get('payload') or {})
+        return {"success": success, "message": msg}
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
+@app.route('/auth/batch', methods=['POST'])
+def auth_batch():
+    data = request.get_json(force=True, silent=True) or {}
+    ops = data.get('ops') if isinstance(data, dict) else None
+
+    if not isinstance(ops, list):
+        return jsonify({"success": False, "message": "'ops' must be a list."}), 400
+    if len(ops) > BATCH_MAX_OPS:
+        return jsonify({"success": False, "message": f"Batch too large (max {BATCH_MAX_OPS} ops)."}), 413
+
+    # On gevent workers, overlap the I/O-bound ops (Mongo writes, OTP emails)
+    if _gevent_active():
+        results = Group().map(_run_batch_op, ops)
+    else:
+        results = [_run_batch_op(item) for item in ops]
 
-if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    return jsonify({"success": True, "results": results}), 200
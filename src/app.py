@@ -1,18 +1,38 @@
 import streamlit as st
+import gc
+import io
+import json
 import os
 import re
+import shutil
 import sys
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from PIL import Image
 import numpy as np
 import cv2
+import streamlit.components.v1 as components
 
-# Add project root to path so 'src' module can be found
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add project root to path so 'src' module can be found (once; `streamlit run` reloads this file)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
-from src.face_verification.face_utils import FaceVerifier
+from src.face_verification.face_utils import FaceVerifier, release_cached_models
 from src.doc_verification.doc_utils import DocumentVerifier
+from src.database.db_connection import Database, to_bson_safe
+from src.behavior_analysis.behavior_utils import BehaviorServer
+from src.auth_service import AuthService
+from src.config import DATA_DIR
+from bson import Binary
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Set page config
 st.set_page_config(
@@ -21,22 +41,97 @@ st.set_page_config(
     layout="wide"
 )
 
-@st.cache_resource
+# Models are loaded and cached independently, so a page only pays for the one it uses.
+# One instance each per process; the cached loaders serialize concurrent first calls.
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_face_verifier():
+    """Load and cache the face model to avoid reloading on every interaction"""
+    return FaceVerifier()
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_doc_verifier():
+    """Load and cache the document models to avoid reloading on every interaction"""
+    return DocumentVerifier()
+
+def unload_models():
+    """
+    Drop the cached models (they reload on next use): our verifier wrappers, which own the
+    ONNX Runtime session and EfficientNet, plus deepface's own model cache. No keras
+    clear_session(): other sessions may be mid-inference on these models; their memory is
+    freed once those references finish.
+    """
+    get_face_verifier.clear()
+    get_doc_verifier.clear()
+    release_cached_models()
+    gc.collect()
+
 def get_models():
-    """Load and cache models to avoid reloading on every interaction"""
-    face_verifier = FaceVerifier()
-    doc_verifier = DocumentVerifier()
-    return face_verifier, doc_verifier
+    """Both verifiers (for pages that need face and document checks)"""
+    return get_face_verifier(), get_doc_verifier()
 
-def load_image(image_file):
-    """Convert Streamlit file buffer to OpenCV BGR format"""
-    image = Image.open(image_file)
-    image = np.array(image.convert('RGB'))
-    return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+@st.cache_resource
+def get_db():
+    """Shared Database wrapper; the underlying MongoClient pools connections across reruns"""
+    return Database()
 
-def main():
-    # --- Custom CSS for Premium UI ---
-    st.markdown("""
+# Long-edge cap for images fed to detection/embedding/doc checks (originals are saved to disk as-is)
+MAX_IMAGE_SIDE = 1024
+
+def fit_to_max_side(image, max_side=MAX_IMAGE_SIDE):
+    """Downscale so the longer side is at most max_side; smaller images are returned unchanged"""
+    scale = max_side / max(image.shape[:2])
+    if scale >= 1:
+        return image
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_image_bytes(raw: bytes, max_side=MAX_IMAGE_SIDE):
+    """Decode image bytes straight to OpenCV BGR, capped at max_side; cached so reruns skip decode + resize"""
+    image = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        image = _load_image_pil(raw, max_side)
+    if image is None:
+        raise ValueError("Could not decode image. Please upload a valid JPG or PNG.")
+    return fit_to_max_side(image, max_side)
+
+def _load_image_pil(raw, max_side=MAX_IMAGE_SIDE):
+    """Fallback decoder for formats OpenCV can't read; returns BGR or None"""
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(raw)) as image:
+            # JPEG only: let the decoder downscale (DCT scaling) to no less than max_side
+            image.draft('RGB', (max_side, max_side))
+            return cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    except Exception:
+        return None
+
+def load_image(image_file, max_side=MAX_IMAGE_SIDE):
+    """Convert Streamlit file buffer to OpenCV BGR format, downscaled for the verifiers"""
+    return load_image_bytes(image_file.getvalue(), max_side)
+
+def dumps_json(obj):
+    """Serialize to a JSON string, via orjson (NumPy-aware) when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj)
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MB: a 2 MB upload is written in two syscalls
+
+def save_upload(uploaded_file, path):
+    """Stream an uploaded file to disk in chunks; the temp file + rename means readers never see a partial image"""
+    uploaded_file.seek(0)
+    tmp_path = path + ".part"
+    with open(tmp_path, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f, length=UPLOAD_CHUNK_SIZE)
+        # Audit copies are rarely read back; hint the kernel not to keep them in page cache (Linux)
+        if hasattr(os, "posix_fadvise"):
+            f.flush()
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    os.replace(tmp_path, path)
+    uploaded_file.seek(0)
+
+# --- Custom CSS for Premium UI (module constant: built once, not per rerun) ---
+APP_CSS = """
     <style>
     /* Global Styles */
     .stApp {
@@ -350,17 +445,35 @@ def main():
         font-size: 1rem;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+# Session keys every page relies on, seeded once per session
+_DEFAULTS = (
+    ('logged_in', False),
+    ('user_role', 'guest'),
+    ('user_name', ''),
+    ('nav_to', None),
+    ('login_otp_step', 1),
+    ('login_otp_email', ""),
+)
+
+# CTA target -> position in the logged-out menu
+_NAV_INDEX = {'register': 1, 'login': 2}
+
+def _init_state():
+    state = st.session_state
+    for key, value in _DEFAULTS:
+        state.setdefault(key, value)
+    if 'behavior_session_id' not in state:
+        state.behavior_session_id = uuid.uuid4().hex
+
+def main():
+    state = st.session_state
+    # --- Custom CSS for Premium UI ---
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
     # --- Session State Initialization ---
-    if 'logged_in' not in st.session_state:
-        st.session_state['logged_in'] = False
-    if 'user_role' not in st.session_state:
-        st.session_state['user_role'] = 'guest'
-    if 'user_name' not in st.session_state:
-        st.session_state['user_name'] = ''
-    if 'nav_to' not in st.session_state:
-        st.session_state['nav_to'] = None
+    _init_state()
 
     # --- Premium Navbar ---
     st.markdown("""
@@ -376,8 +489,8 @@ def main():
     col_nav, col_user = st.columns([5, 1])
     
     with col_nav:
-        if st.session_state['logged_in']:
-            if st.session_state['user_role'] == 'admin':
+        if state.logged_in:
+            if state.user_role == 'admin':
                 menu_options = ["🏠 Home", "✅ Verify (e-KYC)", "📊 Admin Dashboard", "🚪 Logout"]
             else:
                 menu_options = ["🏠 Home", "✅ Verify (e-KYC)", "🚪 Logout"]
@@ -386,20 +499,17 @@ def main():
         
         # Check if navigation was triggered by CTA buttons
         default_index = 0
-        if st.session_state['nav_to'] == 'register' and not st.session_state['logged_in']:
-            default_index = 1  # Register is at index 1
-            st.session_state['nav_to'] = None  # Reset after use
-        elif st.session_state['nav_to'] == 'login' and not st.session_state['logged_in']:
-            default_index = 2  # Login is at index 2
-            st.session_state['nav_to'] = None  # Reset after use
+        if not state.logged_in and state.nav_to:
+            default_index = _NAV_INDEX.get(state.nav_to, 0)
+            state.nav_to = None  # Reset after use
 
         selected_page = st.radio("", menu_options, horizontal=True, label_visibility="collapsed", index=default_index)
 
     with col_user:
-        if st.session_state['logged_in']:
+        if state.logged_in:
             st.markdown(f"""
             <div style='text-align: right; padding: 8px 15px; background: rgba(124, 58, 237, 0.2); border-radius: 20px; border: 1px solid rgba(124, 58, 237, 0.3);'>
-                👤 <b style='color: #00d4ff;'>{st.session_state['user_name']}</b>
+                👤 <b style='color: #00d4ff;'>{state.user_name}</b>
             </div>
             """, unsafe_allow_html=True)
 
@@ -411,19 +521,21 @@ def main():
     elif "Login" in selected_page:
         show_login_page()
     elif "Verify" in selected_page:
-        if st.session_state['logged_in']:
+        if state.logged_in:
             show_verification_page()
         else:
             st.warning("⚠️ Please login to access the verification page.")
     elif "Admin" in selected_page:
-        if st.session_state['logged_in'] and st.session_state['user_role'] == 'admin':
+        if state.logged_in and state.user_role == 'admin':
             show_admin_page()
         else:
             st.error("⛔ Access Denied: Admin privileges required.")
     elif "Logout" in selected_page:
-        st.session_state['logged_in'] = False
-        st.session_state['user_role'] = 'guest'
-        st.session_state['user_name'] = ''
+        state.logged_in = False
+        state.user_role = 'guest'
+        state.user_name = ''
+        state.pop('stored_embedding', None)
+        state.pop('user_doc', None)
         st.rerun()
 
 # --- Page Functions ---
@@ -431,39 +543,32 @@ def main():
 
 
 # --- Behavioral Analysis Integration ---
-import streamlit.components.v1 as components
-from src.behavior_analysis.behavior_utils import BehaviorServer
-from src.auth_service import AuthService
-import uuid
+# Initialize Services (Singleton, shared across sessions like the models)
+@st.cache_resource(show_spinner=False)
+def get_behavior_server():
+    """Start the tracker endpoint thread once per process"""
+    return BehaviorServer()
 
-# Initialize Services (Singleton)
-@st.cache_resource
-def init_services():
-    return BehaviorServer(), AuthService()
+@st.cache_resource(show_spinner=False)
+def get_auth_service():
+    """AuthService bound to the shared Database"""
+    return AuthService(get_db())
 
-behavior_server, auth_service = init_services()
+behavior_server = get_behavior_server()
+auth_service = get_auth_service()
 
 def inject_behavior_script():
     """
     Injects the passive JavaScript tracker with a synchronized Session ID.
     """
-    if 'behavior_session_id' not in st.session_state:
-        st.session_state['behavior_session_id'] = str(uuid.uuid4())
-
-    session_id = st.session_state['behavior_session_id']
+    session_id = st.session_state.behavior_session_id
     
     try:
-        js_path = os.path.join(os.path.dirname(__file__), 'behavior_analysis', 'behavior_tracker.js')
-        with open(js_path, 'r') as f:
-            js_code = f.read()
-            
-        # Inject Python Session ID into JS scope
-        html_code = f"""
-        <script>
-            window.PYTHON_SESSION_ID = "{session_id}";
-            {js_code}
-        </script>
-        """
+        # Inject Python Session ID into JS scope; the tracker itself is a cached, versioned script
+        html_code = (
+            f'<script>window.PYTHON_SESSION_ID = "{session_id}";</script>'
+            f'<script src="{behavior_server.tracker_script_url()}"></script>'
+        )
         components.html(html_code, height=0, width=0) # Invisible
     except Exception as e:
         print(f"Error injecting JS: {e}")
@@ -524,7 +629,152 @@ def inject_ui_enhancements():
 
 # --- Page Functions ---
 
+# Static home-page HTML, built once per run and rendered with st.html (no Markdown pass)
+HOME_THREATS_HTML = "".join([
+    "<div class='section-header'><h2>🎯 Common Attack Vectors We Detect</h2><p>Our system is trained to identify and block these fraud techniques</p></div>",
+    '<div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">',
+    '<div class="threat-card">'
+    '<div class="threat-icon">🆔</div>'
+    '<div class="threat-title">Forged Documents</div>'
+    '<div class="threat-desc">Photoshopped IDs, fake Aadhaar/PAN cards, AI-generated government documents</div>'
+    '</div>',
+    '<div class="threat-card">'
+    '<div class="threat-icon">🎭</div>'
+    '<div class="threat-title">Deepfake Faces</div>'
+    '<div class="threat-desc">AI-generated selfies, video replays, photo masks, screen spoofing</div>'
+    '</div>',
+    '<div class="threat-card">'
+    '<div class="threat-icon">🤖</div>'
+    '<div class="threat-title">Bot Attacks</div>'
+    '<div class="threat-desc">Automated registrations, script-driven form fills, abnormal behavior patterns</div>'
+    '</div>',
+    '<div class="threat-card">'
+    '<div class="threat-icon">👤</div>'
+    '<div class="threat-title">Identity Theft</div>'
+    '<div class="threat-desc">Stolen credentials, mismatched biometrics, unauthorized access attempts</div>'
+    '</div>',
+    '</div>',
+])
+
+HOME_FEATURES_HTML = "".join([
+    '<div style="display: flex; gap: 20px;">',
+    '<div class="solution-card" style="flex: 1;">'
+    '<div class="solution-icon">📄</div>'
+    '<div class="solution-title">Document Verification</div>'
+    '<div class="solution-desc">'
+    'ELA (Error Level Analysis) detects image tampering. '
+    'EfficientNet AI model classifies real vs fake documents. '
+    'OCR extracts and validates ID information.'
+    '</div></div>',
+    '<div class="solution-card" style="flex: 1;">'
+    '<div class="solution-icon">👤</div>'
+    '<div class="solution-title">Biometric Verification</div>'
+    '<div class="solution-desc">'
+    'DeepFace ensures live person detection. '
+    'Anti-spoofing algorithms block photos & masks. '
+    'Face embedding matching confirms identity.'
+    '</div></div>',
+    '<div class="solution-card" style="flex: 1;">'
+    '<div class="solution-icon">🧠</div>'
+    '<div class="solution-title">Behavioral Analysis</div>'
+    '<div class="solution-desc">'
+    'Keystroke dynamics detect bot behavior. '
+    'Mouse movement patterns analyzed. '
+    'Session metadata flags suspicious activity.'
+    '</div></div>',
+    '</div>',
+])
+
+HOME_WORKFLOW_HTML = "".join([
+    "<br><div class='section-header'><h2>🔄 e-KYC Verification Workflow</h2><p>Secure end-to-end identity verification process</p></div>",
+    '<div class="workflow-container">'
+    '<div style="display: flex; justify-content: center; align-items: center; flex-wrap: wrap; gap: 10px;">',
+    '<div class="workflow-step">'
+    '<div class="workflow-number">1</div>'
+    '<div class="workflow-icon">📱</div>'
+    '<div class="workflow-label">Phone OTP</div>'
+    '</div>',
+    '<div class="workflow-arrow">→</div>',
+    '<div class="workflow-step">'
+    '<div class="workflow-number">2</div>'
+    '<div class="workflow-icon">📝</div>'
+    '<div class="workflow-label">Registration</div>'
+    '</div>',
+    '<div class="workflow-arrow">→</div>',
+    '<div class="workflow-step">'
+    '<div class="workflow-number">3</div>'
+    '<div class="workflow-icon">📄</div>'
+    '<div class="workflow-label">Doc Upload</div>'
+    '</div>',
+    '<div class="workflow-arrow">→</div>',
+    '<div class="workflow-step">'
+    '<div class="workflow-number">4</div>'
+    '<div class="workflow-icon">🤳</div>'
+    '<div class="workflow-label">Live Selfie</div>'
+    '</div>',
+    '<div class="workflow-arrow">→</div>',
+    '<div class="workflow-step">'
+    '<div class="workflow-number">5</div>'
+    '<div class="workflow-icon">🔍</div>'
+    '<div class="workflow-label">AI Analysis</div>'
+    '</div>',
+    '<div class="workflow-arrow">→</div>',
+    '<div class="workflow-step">'
+    '<div class="workflow-number">6</div>'
+    '<div class="workflow-icon">✅</div>'
+    '<div class="workflow-label">Decision</div>'
+    '</div>',
+    '</div></div>',
+])
+
+HOME_STATS_HTML = "".join([
+    "<br><div class='section-header'><h2>📈 Platform Statistics</h2></div>",
+    '<div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">',
+    '<div class="stat-card">'
+    '<div class="stat-number">99.2%</div>'
+    '<div class="stat-label">Fraud Detection Rate</div>'
+    '</div>',
+    '<div class="stat-card">'
+    '<div class="stat-number">&lt;2s</div>'
+    '<div class="stat-label">Average Verification Time</div>'
+    '</div>',
+    '<div class="stat-card">'
+    '<div class="stat-number">3-Layer</div>'
+    '<div class="stat-label">Security Pipeline</div>'
+    '</div>',
+    '<div class="stat-card">'
+    '<div class="stat-number">24/7</div>'
+    '<div class="stat-label">Real-time Monitoring</div>'
+    '</div>',
+    '</div>',
+])
+
+HOME_CTA_HTML = (
+    '<div class="cta-section">'
+    '<div class="cta-title">🚀 Ready to Get Started?</div>'
+    '<div class="cta-subtitle">Create your verified identity baseline in minutes</div>'
+    '</div>'
+)
+
+# Everything between the problem statement and the CTA buttons, rendered in one call
+HOME_BODY_HTML = "".join([
+    HOME_THREATS_HTML,
+    "<br><div class='section-header'><h2>🛡️ Our Multi-Layer Protection System</h2><p>Comprehensive AI-powered verification at every step</p></div>",
+    HOME_FEATURES_HTML,
+    HOME_WORKFLOW_HTML,
+    HOME_STATS_HTML,
+    HOME_CTA_HTML,
+])
+
+HOME_FOOTER_HTML = """
+<div class="footer">
+    <p>© 2026 SecureKYC - Synthetic Identity Fraud Detection System</p>
+    <p>Built with 🛡️ Security First | Compliant with GDPR & Data Privacy Standards</p>
+</div>
+"""
+
 def show_home_page():
+    state = st.session_state
     # Hero Section
     st.markdown("""
     <div class="hero-section">
@@ -551,182 +801,8 @@ def show_home_page():
     </div>
     """, unsafe_allow_html=True)
     
-    # Threat Cards
-    st.markdown("<div class='section-header'><h2>🎯 Common Attack Vectors We Detect</h2><p>Our system is trained to identify and block these fraud techniques</p></div>", unsafe_allow_html=True)
-    
-    t1, t2, t3, t4 = st.columns(4)
-    
-    with t1:
-        st.markdown("""
-        <div class="threat-card">
-            <div class="threat-icon">🆔</div>
-            <div class="threat-title">Forged Documents</div>
-            <div class="threat-desc">Photoshopped IDs, fake Aadhaar/PAN cards, AI-generated government documents</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with t2:
-        st.markdown("""
-        <div class="threat-card">
-            <div class="threat-icon">🎭</div>
-            <div class="threat-title">Deepfake Faces</div>
-            <div class="threat-desc">AI-generated selfies, video replays, photo masks, screen spoofing</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with t3:
-        st.markdown("""
-        <div class="threat-card">
-            <div class="threat-icon">🤖</div>
-            <div class="threat-title">Bot Attacks</div>
-            <div class="threat-desc">Automated registrations, script-driven form fills, abnormal behavior patterns</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with t4:
-        st.markdown("""
-        <div class="threat-card">
-            <div class="threat-icon">👤</div>
-            <div class="threat-title">Identity Theft</div>
-            <div class="threat-desc">Stolen credentials, mismatched biometrics, unauthorized access attempts</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Our Solution
-    st.markdown("<div class='section-header'><h2>🛡️ Our Multi-Layer Protection System</h2><p>Comprehensive AI-powered verification at every step</p></div>", unsafe_allow_html=True)
-    
-    s1, s2, s3 = st.columns(3)
-    
-    with s1:
-        st.markdown("""
-        <div class="solution-card">
-            <div class="solution-icon">📄</div>
-            <div class="solution-title">Document Verification</div>
-            <div class="solution-desc">
-                ELA (Error Level Analysis) detects image tampering. 
-                EfficientNet AI model classifies real vs fake documents. 
-                OCR extracts and validates ID information.
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with s2:
-        st.markdown("""
-        <div class="solution-card">
-            <div class="solution-icon">👤</div>
-            <div class="solution-title">Biometric Verification</div>
-            <div class="solution-desc">
-                DeepFace ensures live person detection.
-                Anti-spoofing algorithms block photos & masks.
-                Face embedding matching confirms identity.
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with s3:
-        st.markdown("""
-        <div class="solution-card">
-            <div class="solution-icon">🧠</div>
-            <div class="solution-title">Behavioral Analysis</div>
-            <div class="solution-desc">
-                Keystroke dynamics detect bot behavior.
-                Mouse movement patterns analyzed.
-                Session metadata flags suspicious activity.
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Workflow Pipeline
-    st.markdown("<br><div class='section-header'><h2>🔄 e-KYC Verification Workflow</h2><p>Secure end-to-end identity verification process</p></div>", unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="workflow-container">
-        <div style="display: flex; justify-content: center; align-items: center; flex-wrap: wrap; gap: 10px;">
-            <div class="workflow-step">
-                <div class="workflow-number">1</div>
-                <div class="workflow-icon">📱</div>
-                <div class="workflow-label">Phone OTP</div>
-            </div>
-            <div class="workflow-arrow">→</div>
-            <div class="workflow-step">
-                <div class="workflow-number">2</div>
-                <div class="workflow-icon">📝</div>
-                <div class="workflow-label">Registration</div>
-            </div>
-            <div class="workflow-arrow">→</div>
-            <div class="workflow-step">
-                <div class="workflow-number">3</div>
-                <div class="workflow-icon">📄</div>
-                <div class="workflow-label">Doc Upload</div>
-            </div>
-            <div class="workflow-arrow">→</div>
-            <div class="workflow-step">
-                <div class="workflow-number">4</div>
-                <div class="workflow-icon">🤳</div>
-                <div class="workflow-label">Live Selfie</div>
-            </div>
-            <div class="workflow-arrow">→</div>
-            <div class="workflow-step">
-                <div class="workflow-number">5</div>
-                <div class="workflow-icon">🔍</div>
-                <div class="workflow-label">AI Analysis</div>
-            </div>
-            <div class="workflow-arrow">→</div>
-            <div class="workflow-step">
-                <div class="workflow-number">6</div>
-                <div class="workflow-icon">✅</div>
-                <div class="workflow-label">Decision</div>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Stats Section
-    st.markdown("<br><div class='section-header'><h2>📈 Platform Statistics</h2></div>", unsafe_allow_html=True)
-    
-    stat1, stat2, stat3, stat4 = st.columns(4)
-    
-    with stat1:
-        st.markdown("""
-        <div class="stat-card">
-            <div class="stat-number">99.2%</div>
-            <div class="stat-label">Fraud Detection Rate</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with stat2:
-        st.markdown("""
-        <div class="stat-card">
-            <div class="stat-number">&lt;2s</div>
-            <div class="stat-label">Average Verification Time</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with stat3:
-        st.markdown("""
-        <div class="stat-card">
-            <div class="stat-number">3-Layer</div>
-            <div class="stat-label">Security Pipeline</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with stat4:
-        st.markdown("""
-        <div class="stat-card">
-            <div class="stat-number">24/7</div>
-            <div class="stat-label">Real-time Monitoring</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # CTA Section
-    st.markdown("""
-    <div class="cta-section">
-        <div class="cta-title">🚀 Ready to Get Started?</div>
-        <div class="cta-subtitle">Create your verified identity baseline in minutes</div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Threats, solution, workflow, stats and CTA banner (static HTML, one render call)
+    st.html(HOME_BODY_HTML)
     
     # CTA Buttons using Streamlit
     cta1, cta2, cta3 = st.columns([1, 2, 1])
@@ -734,11 +810,11 @@ def show_home_page():
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
             if st.button("📝 Register Now", use_container_width=True, type="primary"):
-                st.session_state['nav_to'] = 'register'
+                state.nav_to = 'register'
                 st.rerun()
         with col_btn2:
             if st.button("🔐 Login", use_container_width=True):
-                st.session_state['nav_to'] = 'login'
+                state.nav_to = 'login'
                 st.rerun()
     
     # Tech Stack
@@ -767,12 +843,7 @@ def show_home_page():
             """)
     
     # Footer
-    st.markdown("""
-    <div class="footer">
-        <p>© 2026 SecureKYC - Synthetic Identity Fraud Detection System</p>
-        <p>Built with 🛡️ Security First | Compliant with GDPR & Data Privacy Standards</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(HOME_FOOTER_HTML)
 
 
 def show_registration_page():
@@ -783,6 +854,12 @@ def show_registration_page():
     st.header("📝 User Registration (Baseline Creation)")
     st.markdown("Create a verified identity baseline. This data will be used to detect fraud in future transactions.")
 
+    registration_fragment()
+
+# Reruns triggered inside the form (uploads, submit, OTP step) only re-execute this fragment
+@st.fragment
+def registration_fragment():
+    state = st.session_state
     # --- Registration Form ---
     st.markdown("### Enter your details")
 
@@ -812,13 +889,9 @@ def show_registration_page():
 
         submitted = st.form_submit_button("🚀 Register Identity")
 
-        # -- Backend Connection --
-        from src.config import DATA_DIR
-        import os
-        
         if submitted:
             # --- Behavioral Fraud Check ---
-            session_id = st.session_state.get('behavior_session_id')
+            session_id = state.get('behavior_session_id')
             risk_score, decision, reasons = behavior_server.get_score(session_id)
             
             # Use columns to show risk signal without breaking flow (or blocking if critical)
@@ -847,46 +920,48 @@ def show_registration_page():
                     
                     # Save ID Doc
                     doc_path = os.path.join(user_folder, "id_document.png")
-                    with open(doc_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
+                    save_upload(uploaded_file, doc_path)
                         
                     # Save Selfie
                     selfie_path = os.path.join(user_folder, "selfie.png")
-                    with open(selfie_path, "wb") as f:
-                        f.write(selfie_image.getbuffer())
+                    save_upload(selfie_image, selfie_path)
 
-                    # 2. Simulate Embeddings/Behavior
-                    dummy_embedding = b'\\x00' * 128 
-                    
-                    # Store the Real Behavioral Baseline
-                    import json
-                    behavior_baseline = json.dumps({
+                    # 2. Store the Real Behavioral Baseline
+                    behavior_baseline = dumps_json({
                         "risk_score": risk_score,
                         "decision": decision,
                         "reasons": reasons,
                         "session_id": session_id
                     })
                     # 3. Generate Real Face Embedding
-                    face_verifier, _ = get_models()
-                    
-                    # Convert selfie for processing
-                    selfie_cv2 = load_image(selfie_image)
-                    
-                    # Detect and embed
-                    cropped_face = face_verifier.detect_face(selfie_cv2)
-                    if cropped_face is None:
-                        st.error("⚠️ No face detected in selfie! Please try again.")
-                        return 
+                    # A resubmit with the same selfie (e.g. after fixing the email) reuses its embedding
+                    cached_embedding = state.get('reg_selfie_embedding')
+                    if cached_embedding and cached_embedding[0] == selfie_image.file_id:
+                        embedding_packed = cached_embedding[1]
+                    else:
+                        face_verifier = get_face_verifier()
                         
-                    real_embedding = face_verifier.get_embedding(cropped_face)
-                    if real_embedding is None:
-                        st.error("⚠️ Could not generate face embedding. Low quality image?")
-                        return
+                        # Convert selfie for processing
+                        selfie_cv2 = load_image(selfie_image)
                         
-                    # Convert numpy array to list for MongoDB storage
-                    embedding_list = real_embedding.tolist()
-                    
-                    dummy_behavior = "{'avg_flight': 0.2}"
+                        # Detect and embed
+                        cropped_face = face_verifier.detect_face(selfie_cv2)
+                        if cropped_face is None:
+                            st.error("⚠️ No face detected in selfie! Please try again.")
+                            return 
+                            
+                        real_embedding = face_verifier.get_embedding(cropped_face)
+                        embedding_norm = np.linalg.norm(real_embedding) if real_embedding is not None else 0.0
+                        if embedding_norm == 0:
+                            st.error("⚠️ Could not generate face embedding. Low quality image?")
+                            return
+                            
+                        # Store unit-length so verification needs only a dot product
+                        real_embedding = real_embedding / embedding_norm
+                        
+                        # Pack as raw float32 bytes for MongoDB storage (decoded with np.frombuffer, no list parsing)
+                        embedding_packed = Binary(np.ascontiguousarray(real_embedding, dtype=np.float32).tobytes())
+                        state.reg_selfie_embedding = (selfie_image.file_id, embedding_packed)
 
                     # 4. Create User Data Dict
                     # Auto-generate password from DOB (YYYYMMDD)
@@ -904,7 +979,9 @@ def show_registration_page():
                         "document_type": doc_type,
                         "document_id": doc_id_number,
                         "password": password, # Will be hashed by AuthService
-                        "face_embedding": embedding_list, 
+                        "face_embedding": embedding_packed,
+                        "embedding_dtype": "float32",
+                        "embedding_normalized": True,
                         "behavior_baseline": behavior_baseline,
                         "role": "user"
                     }
@@ -913,12 +990,14 @@ def show_registration_page():
                     success, msg = auth_service.register_user(user_data)
                     
                     if success:
+                        # New user should show up on the Admin Dashboard right away
+                        get_admin_users.clear()
                         st.success(f"✅ {msg}")
                         st.caption(f"Behavior Risk: {decision} ({risk_score:.2f})")
                         
                         # Store email in session for the verification step
-                        st.session_state['reg_email'] = email
-                        st.session_state['reg_awaiting_verification'] = True
+                        state.reg_email = email
+                        state.reg_awaiting_verification = True
 
                     else:
                         st.error(f"⚠️ Registration Failed: {msg}")
@@ -927,26 +1006,27 @@ def show_registration_page():
                     st.error(f"An error occurred: {e}")
 
     # --- Post-Registration Verification Step ---
-    if st.session_state.get('reg_awaiting_verification') and st.session_state.get('reg_email'):
+    if state.get('reg_awaiting_verification') and state.get('reg_email'):
         st.divider()
         st.subheader("✅ Final Step: Verify Email")
-        st.info(f"An OTP has been sent to **{st.session_state['reg_email']}**. Enter it below to complete registration.")
+        st.info(f"An OTP has been sent to **{state.reg_email}**. Enter it below to complete registration.")
         
         with st.form("reg_verify_form"):
             otp_code = st.text_input("Enter Verification Code", max_chars=6)
             verify_btn = st.form_submit_button("Verify & Login")
             
             if verify_btn:
-                success, msg, user = auth_service.verify_login_otp(st.session_state['reg_email'], otp_code)
+                success, msg, user = auth_service.verify_login_otp(state.reg_email, otp_code)
                 if success:
-                    st.session_state['logged_in'] = True
-                    st.session_state['user_name'] = user.get('full_name', 'User')
-                    st.session_state['user_role'] = user.get('role', 'user')
-                    st.session_state['user_email'] = user.get('email')
+                    state.logged_in = True
+                    state.user_name = user.get('full_name', 'User')
+                    state.user_role = user.get('role', 'user')
+                    state.user_email = user.get('email')
+                    cache_login_user(user)
                     
                     # Clear reg state
-                    st.session_state['reg_awaiting_verification'] = False
-                    st.session_state['reg_email'] = None
+                    state.reg_awaiting_verification = False
+                    state.reg_email = None
                     
                     st.balloons()
                     st.success("🎉 Verification Successful! Logging you in...")
@@ -956,12 +1036,7 @@ def show_registration_page():
                     st.error(msg)
 
 def show_login_page():
-    # Inject Behavior Tracker
-    inject_behavior_script()
-
-    st.header("🔐 User Login")
-    
-def show_login_page():
+    state = st.session_state
     # Inject Behavior Tracker
     inject_behavior_script()
 
@@ -971,16 +1046,10 @@ def show_login_page():
     login_container = st.container()
     
     with login_container:
-        # Initialize state
-        if 'login_otp_step' not in st.session_state:
-            st.session_state['login_otp_step'] = 1
-        if 'login_otp_email' not in st.session_state:
-            st.session_state['login_otp_email'] = ""
-
         # --- STEP 1: Enter Email ---
-        if st.session_state['login_otp_step'] == 1:
+        if state.login_otp_step == 1:
             with st.form("login_step1_form"):
-                email_input = st.text_input("Enter your Registered Email", value=st.session_state['login_otp_email'])
+                email_input = st.text_input("Enter your Registered Email", value=state.login_otp_email)
                 sent = st.form_submit_button("Send Verification Code")
                 
                 if sent:
@@ -988,7 +1057,7 @@ def show_login_page():
                         st.error("Please enter your email.")
                     else:
                         # Behavioral Check
-                        session_id = st.session_state.get('behavior_session_id')
+                        session_id = state.get('behavior_session_id')
                         risk_score, decision, reasons = behavior_server.get_score(session_id)
                         
                         if decision == "REJECT":
@@ -996,16 +1065,16 @@ def show_login_page():
                         else:
                             success, msg = auth_service.send_login_otp(email_input)
                             if success:
-                                st.session_state['login_otp_email'] = email_input
-                                st.session_state['login_otp_step'] = 2
+                                state.login_otp_email = email_input
+                                state.login_otp_step = 2
                                 st.success(msg)
                                 st.rerun()
                             else:
                                 st.error(msg)
         
         # --- STEP 2: Enter OTP ---
-        elif st.session_state['login_otp_step'] == 2:
-            st.info(f"msg sent to **{st.session_state['login_otp_email']}**")
+        elif state.login_otp_step == 2:
+            st.info(f"msg sent to **{state.login_otp_email}**")
             
             with st.form("login_step2_form"):
                 otp_input = st.text_input("Enter Verification Code", max_chars=6)
@@ -1016,16 +1085,17 @@ def show_login_page():
                     verify = st.form_submit_button("Verify & Login")
                 
                 if change_email:
-                    st.session_state['login_otp_step'] = 1
+                    state.login_otp_step = 1
                     st.rerun()
                 
                 if verify:
-                    success, msg, user = auth_service.verify_login_otp(st.session_state['login_otp_email'], otp_input)
+                    success, msg, user = auth_service.verify_login_otp(state.login_otp_email, otp_input)
                     if success:
-                        st.session_state['logged_in'] = True
-                        st.session_state['user_name'] = user.get('full_name', 'User')
-                        st.session_state['user_role'] = user.get('role', 'user')
-                        st.session_state['user_email'] = user.get('email')
+                        state.logged_in = True
+                        state.user_name = user.get('full_name', 'User')
+                        state.user_role = user.get('role', 'user')
+                        state.user_email = user.get('email')
+                        cache_login_user(user)
                         
                         st.balloons()
                         st.success(f"✅ Login Successful! Welcome {user.get('full_name')}")
@@ -1034,11 +1104,88 @@ def show_login_page():
                     else:
                         st.error(msg)
 
-def show_verification_page():
+def decode_stored_embedding(user_record):
+    """Returns the user's stored face embedding as float32 (list or packed bytes), or None"""
+    stored_embedding_raw = user_record.get('face_embedding')
+    if not stored_embedding_raw:
+        return None
+    if isinstance(stored_embedding_raw, (list, np.ndarray)):
+        return np.array(stored_embedding_raw, dtype=np.float32)
+    if isinstance(stored_embedding_raw, bytes):
+        # Packed bytes: float32, or float16 from records written by earlier builds.
+        # Always one writable copy; a frombuffer view over the BSON bytes is read-only.
+        stored_dtype = user_record.get('embedding_dtype', 'float32')
+        return np.frombuffer(stored_embedding_raw, dtype=stored_dtype).astype(np.float32)
+    return None
+
+# Never kept in session_state: secrets, and the raw embedding (cached decoded instead)
+SESSION_USER_EXCLUDED = ('password_hash', 'otp_secret', 'otp_counter', 'otp_expiry', 'face_embedding')
+
+def cache_login_user(user):
+    """
+    Keep the logged-in user's record and decoded (unit-length) embedding in session_state,
+    so verify clicks need neither a DB round-trip nor an embedding decode.
+    """
+    state = st.session_state
+    state.user_doc = {k: v for k, v in user.items() if k not in SESSION_USER_EXCLUDED}
+    try:
+        stored_embedding = decode_stored_embedding(user)
+    except ValueError:
+        stored_embedding = None
+    if stored_embedding is not None and not user.get('embedding_normalized'):
+        norm = np.linalg.norm(stored_embedding)
+        if norm > 0:
+            stored_embedding = stored_embedding / norm
+    state.stored_embedding = stored_embedding
 
+def run_face_pipeline(face_verifier, selfie_img, doc_img, stored_embedding, pre_normalized, skip_event=None):
+    """
+    Liveness -> detect -> embed -> match for the verification page.
+    Runs off the script thread, so problems are returned as a warning message instead of shown via st.*
+    If skip_event is set (document already rejected) the model steps are skipped and face_decision is "SKIPPED".
+    Returns: (is_live, liveness_score, match_score, face_decision, doc_photo_score, warning)
+    """
+    # Liveness (the selfie's grayscale is computed once and reused for detection)
+    selfie_gray = cv2.cvtColor(selfie_img, cv2.COLOR_BGR2GRAY)
+    is_live, liveness_score = face_verifier.check_liveness(selfie_img, gray=selfie_gray)
+    
+    # Matching
+    match_score = 0.0
+    face_decision = "FAIL"
+    doc_photo_score = None
+    
+    if not is_live:
+        return is_live, liveness_score, match_score, face_decision, doc_photo_score, "⚠️ Liveness Check Failed! Possible spoof detected."
+    
+    if skip_event is not None and skip_event.is_set():
+        return is_live, liveness_score, match_score, "SKIPPED", doc_photo_score, "Face matching skipped: document was rejected."
+    
+    cropped_face = face_verifier.detect_face(selfie_img, gray=selfie_gray)
+    if cropped_face is None:
+        return is_live, liveness_score, match_score, face_decision, doc_photo_score, "Face not detected in selfie."
+    
+    if skip_event is not None and skip_event.is_set():
+        return is_live, liveness_score, match_score, "SKIPPED", doc_photo_score, "Face matching skipped: document was rejected."
+    
+    # Embed the selfie and (if found) the ID photo in one forward pass
+    doc_face = face_verifier.detect_face(doc_img)
+    faces = [cropped_face] if doc_face is None else [cropped_face, doc_face]
+    embeddings = face_verifier.get_embeddings_batch(faces)
+    live_embedding = embeddings[0] if embeddings is not None else None
+    if embeddings is not None and len(embeddings) > 1:
+        # Informational only: does not affect the decision
+        doc_photo_score, _ = face_verifier.verify_with_stored_embedding(live_embedding, embeddings[1])
+    
+    if live_embedding is None or stored_embedding is None:
+        return is_live, liveness_score, match_score, face_decision, doc_photo_score, "Could not generate embeddings for comparison."
+    
+    match_score, face_decision = face_verifier.verify_with_stored_embedding(
+        live_embedding, stored_embedding, pre_normalized=pre_normalized
+    )
+    return is_live, liveness_score, match_score, face_decision, doc_photo_score, None
 
-    st.header("e-KYC Verification")
-    st.info("Verification module coming soon...")
+def show_verification_page():
+    state = st.session_state
     st.header("🕵️ e-KYC Verification")
     st.markdown("Verify your identity by uploading your ID and taking a live selfie.")
 
@@ -1067,31 +1214,28 @@ def show_verification_page():
                 doc_img = load_image(doc_file)
                 selfie_img = load_image(live_selfie)
                 
-                user_email = st.session_state.get('user_name', '') # Using name as placeholder, but ideally need email from session
+                user_email = state.get('user_name', '') # Using name as placeholder, but ideally need email from session
                 # FIX: We need email to fetch stored embedding. 
                 # Assuming 'user_email' was added to session during login attempt earlier. 
                 # If not, we might fail. Let's try fetching user from DB using session info if available.
                 
                 # Retrieve stored user data
-                from src.database.db_connection import Database
-                db = Database()
+                db = get_db()
                 # We need the logged in user's email.
-                # In login we set: st.session_state['user_email'] (I added this in previous turn logic)
-                current_email = st.session_state.get('user_email')
+                # In login we set: state.user_email (I added this in previous turn logic)
+                current_email = state.get('user_email')
                 
                 if not current_email:
                     st.error("Session Error: Could not identify logged-in user.")
                     return
 
-                user_record = db.get_user(current_email)
-                db.close()
+                # Record cached at login; fall back to the DB for sessions that predate it
+                user_record = state.get('user_doc') or db.get_user(current_email)
                 
                 if not user_record:
                     st.error("User record not found in database.")
                     return
 
-                # --- Step 2: Document Verification ---
-                st.info("Analyzing Document...")
                 # We can pass user info to validate against OCR text
                 user_info = {
                     "name": user_record.get('full_name'),
@@ -1099,44 +1243,35 @@ def show_verification_page():
                     "id_number": user_record.get('document_id')
                 }
                 
-                doc_result = doc_verifier.verify_document(doc_img, user_data=user_info)
-                
-                # --- Step 3: Face Verification ---
-                st.info("Verifying Face & Liveness...")
-                
-                # Liveness
-                is_live, liveness_score = face_verifier.check_liveness(selfie_img)
+                # Embedding prefetched at login (already unit-length); else decode from the record
+                stored_embedding = state.get('stored_embedding')
+                pre_normalized = True
+                if stored_embedding is None:
+                    # Fetch just the embedding and convert it (might be bytes, list, or Binary)
+                    embedding_record = db.get_user_embedding(current_email) or {}
+                    try:
+                        stored_embedding = decode_stored_embedding(embedding_record)
+                    except ValueError:
+                        st.warning("Could not decode stored embedding from bytes.")
+                    pre_normalized = bool(embedding_record.get('embedding_normalized'))
                 
-                # Matching
-                match_score = 0.0
-                face_decision = "FAIL"
+                # --- Step 2 & 3: Document and Face Verification (run concurrently) ---
+                # OCR/ELA and the face models are independent and release the GIL in native code
+                st.info("Analyzing Document and Verifying Face & Liveness...")
+                # A rejected document makes the face result moot, so it skips the embedding if not there yet
+                skip_face = threading.Event()
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    doc_future = executor.submit(doc_verifier.verify_document, doc_img, user_data=user_info)
+                    face_future = executor.submit(
+                        run_face_pipeline, face_verifier, selfie_img, doc_img, stored_embedding, pre_normalized, skip_face
+                    )
+                    doc_result = doc_future.result()
+                    if doc_result['decision'] == "REJECT":
+                        skip_face.set()
+                    is_live, liveness_score, match_score, face_decision, doc_photo_score, face_warning = face_future.result()
                 
-                if is_live:
-                    cropped_face = face_verifier.detect_face(selfie_img)
-                    if cropped_face is not None:
-                        live_embedding = face_verifier.get_embedding(cropped_face)
-                        stored_embedding_raw = user_record.get('face_embedding')
-                        
-                        # Convert stored embedding from database (might be bytes, list, or Binary)
-                        stored_embedding = None
-                        if stored_embedding_raw:
-                            if isinstance(stored_embedding_raw, (list, np.ndarray)):
-                                stored_embedding = np.array(stored_embedding_raw, dtype=np.float32)
-                            elif isinstance(stored_embedding_raw, bytes):
-                                # If stored as bytes, convert back to numpy array
-                                try:
-                                    stored_embedding = np.frombuffer(stored_embedding_raw, dtype=np.float32)
-                                except:
-                                    st.warning("Could not decode stored embedding from bytes.")
-                        
-                        if live_embedding is not None and stored_embedding is not None:
-                            match_score, face_decision = face_verifier.verify_with_stored_embedding(live_embedding, stored_embedding)
-                        else:
-                            st.warning("Could not generate embeddings for comparison.")
-                    else:
-                        st.warning("Face not detected in selfie.")
-                else:
-                    st.warning("⚠️ Liveness Check Failed! Possible spoof detected.")
+                if face_warning:
+                    st.warning(face_warning)
 
                 # --- Step 4: Display Results ---
                 st.write("---")
@@ -1163,6 +1298,8 @@ def show_verification_page():
                     st.markdown("#### 👤 Biometric Analysis")
                     st.write(f"**Liveness:** {'PASS ✅' if is_live else 'FAIL ❌'} ({liveness_score:.2f})")
                     st.write(f"**Face Match:** {face_decision} ({match_score:.2f})")
+                    if doc_photo_score is not None:
+                        st.caption(f"Selfie vs ID photo similarity: {doc_photo_score:.2f}")
                     
                     if face_decision == "VERIFIED" and is_live:
                          st.success("Identity Verified ✅")
@@ -1190,13 +1327,12 @@ def show_verification_page():
                     "face_score": face_score_val,
                     "liveness_score": liveness_score_val,
                     "final_decision": final_decision,
-                    "details": str(doc_result)
+                    "details": to_bson_safe(doc_result)  # stored as a queryable sub-document
                 }
                 
-                # Log to DB
-                db = Database()
-                db.log_kyc_attempt(attempt_data)
-                db.close()
+                # Log to DB (batched in the background)
+                db.queue_kyc_attempt(attempt_data)
+                get_admin_logs.clear()
                 
                 if final_decision == "APPROVED":
                     st.balloons()
@@ -1207,14 +1343,34 @@ def show_verification_page():
             except Exception as e:
                 st.error(f"An error occurred during verification: {e}")
 
+ADMIN_PAGE_SIZE = 50
+
+# Admin snapshots: shared across reruns and admins for 10s; cleared on new registrations
+@st.cache_data(ttl=10, show_spinner=False)
+def get_admin_users(page, projection):
+    db = get_db()
+    return db.get_users_page(skip=page * ADMIN_PAGE_SIZE, limit=ADMIN_PAGE_SIZE, projection=projection), db.count_users()
+
+@st.cache_data(ttl=10, show_spinner=False)
+def get_admin_logs(page, projection, before=None):
+    """Returns (logs without _id, total count, keyset cursor for the next page)."""
+    db = get_db()
+    logs = db.get_logs_page(skip=page * ADMIN_PAGE_SIZE, limit=ADMIN_PAGE_SIZE, projection=projection, before=before)
+    next_cursor = (logs[-1].get('timestamp'), logs[-1]['_id']) if logs else None
+    for log in logs:
+        del log['_id']
+    return logs, db.count_logs(), next_cursor
+
 def show_admin_page():
     st.header("📊 Admin Dashboard")
     st.markdown("View system logs and registered users.")
     
-    from src.database.db_connection import Database
-    import pandas as pd
-    
-    db = Database()
+    # Process-wide: every session reloads the models on its next verification
+    confirm_unload = st.checkbox("Confirm model unload (affects all active users)", key="admin_confirm_unload")
+    if st.button("🧹 Unload AI Models", help="Free model memory; models reload on the next verification",
+                 disabled=not confirm_unload):
+        unload_models()
+        st.success("Models unloaded.")
     
     # Tabs for different views
     tab1, tab2 = st.tabs(["👥 Registered Users", "📜 Verification Logs"])
@@ -1222,37 +1378,40 @@ def show_admin_page():
     with tab1:
         st.subheader("User Database")
         try:
-            # Fetch all users
-            users_list = db.get_all_users()
-            df_users = pd.DataFrame(users_list)
+            # Select specific columns to display (including new Doc fields)
+            display_cols = ['full_name', 'email', 'phone', 'dob', 'document_type', 'document_id', 'role', 'created_at']
             
-            if not df_users.empty:
-                # Select specific columns to display (including new Doc fields)
-                display_cols = ['full_name', 'email', 'phone', 'dob', 'document_type', 'document_id', 'role', 'created_at']
-                # Ensure validation in case old users don't have these fields
-                for col in display_cols:
-                    if col not in df_users.columns:
-                        df_users[col] = None
-                        
-                df_users = df_users[display_cols]
-                st.dataframe(df_users, use_container_width=True)
+            # Fetch one page of users, projected server-side
+            page = st.number_input("Page", min_value=0, value=0, step=1, key="admin_users_page")
+            users_list, total_users = get_admin_users(page, display_cols)
+            # Display-only: plain records (missing fields as empty) go straight to st.dataframe
+            user_rows = [{col: user.get(col) for col in display_cols} for user in users_list]
+            
+            if user_rows:
+                st.dataframe(user_rows, column_order=display_cols, use_container_width=True)
             
-            st.metric("Total Users", len(df_users))
+            st.metric("Total Users", total_users)
         except Exception as e:
             st.error(f"Error fetching users: {e}")
             
     with tab2:
         st.subheader("Recent Verification Attempts")
         try:
-             logs_list = db.get_all_logs()
-             df_logs = pd.DataFrame(logs_list)
-             st.dataframe(df_logs, use_container_width=True)
+             # Summary columns only; the per-attempt details blob is left in the database
+             log_cols = ['timestamp', 'user_email', 'final_decision', 'doc_score', 'face_score', 'liveness_score']
+             page = st.number_input("Page", min_value=0, value=0, step=1, key="admin_logs_page")
+             # Keyset paging: remember where each page ended so the next one seeks instead of skipping
+             page_starts = st.session_state.setdefault('admin_logs_page_cursors', {})
+             logs_list, total_logs, next_cursor = get_admin_logs(page, log_cols, page_starts.get(page) if page else None)
+             if logs_list:
+                 page_starts[page + 1] = next_cursor
+                 # Records go straight to st.dataframe; no intermediate pandas copy
+                 st.dataframe(logs_list, column_order=log_cols, use_container_width=True)
+             else:
+                 st.info("No verification logs found yet.")
+             st.caption(f"Total attempts: {total_logs}")
         except Exception as e:
-            st.info("No verification logs found yet.")
-        except Exception as e:
-            st.info("No verification logs found yet.")
-            
-    db.close()
+            st.error(f"Error fetching logs: {e}")
 
 if __name__ == "__main__":
     main()
@@ -2,14 +2,104 @@ import os
 import datetime
 import time
 import random
+import hmac
+import hashlib
+import threading
 from typing import Tuple, Optional
+from cachetools import TTLCache
 from werkzeug.security import generate_password_hash, check_password_hash
 from src.database.db_connection import Database
-from src.otp_service import generate_otp, send_email_otp
+from src.otp_service import generate_otp_secret, generate_hotp, send_email_otp
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+# Argon2id for new hashes; legacy werkzeug hashes are upgraded on the next successful login.
+# t=2, m=19 MiB (OWASP minimum) keeps a login well under the 64 MiB cost per verify;
+# hashes made with the old parameters are rehashed via check_needs_rehash.
+PASSWORD_HASH_TIME_COST = 2
+PASSWORD_HASH_MEMORY_COST = 19456  # KiB
+PASSWORD_HASHER = PasswordHasher(
+    time_cost=PASSWORD_HASH_TIME_COST, memory_cost=PASSWORD_HASH_MEMORY_COST
+) if ARGON2_AVAILABLE else None
+
+def hash_password(password) -> str:
+    """Hashes a password with Argon2id (werkzeug if argon2-cffi is missing)."""
+    if PASSWORD_HASHER is not None:
+        return PASSWORD_HASHER.hash(password)
+    return generate_password_hash(password)
+
+def verify_password(password_hash, password) -> bool:
+    """Verifies a password against an Argon2id or legacy werkzeug hash."""
+    if password_hash.startswith("$argon2"):
+        if PASSWORD_HASHER is None:
+            return False
+        try:
+            return PASSWORD_HASHER.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+def password_needs_rehash(password_hash) -> bool:
+    """True for legacy hashes or Argon2 hashes made with older parameters."""
+    if PASSWORD_HASHER is None:
+        return False
+    if not password_hash.startswith("$argon2"):
+        return True
+    return PASSWORD_HASHER.check_needs_rehash(password_hash)
+
+# Password-check cache: repeat logins within the TTL skip the slow KDF.
+# Keys are HMACs under a per-process pepper, so plaintext passwords never sit in memory.
+LOGIN_CACHE_TTL = 60
+LOGIN_CACHE_SIZE = 10_000
+_LOGIN_PEPPER = os.getenv("LOGIN_CACHE_PEPPER", "").encode() or os.urandom(32)
 
 class AuthService:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db: Optional[Database] = None):
+        # Callers that already hold a Database (e.g. the Streamlit get_db() singleton) can share it
+        self._db = db
+        self._db_lock = threading.Lock()
+        self._login_cache = TTLCache(maxsize=LOGIN_CACHE_SIZE, ttl=LOGIN_CACHE_TTL)
+        self._login_cache_lock = threading.Lock()
+
+    @property
+    def db(self) -> Database:
+        """
+        The Database, built on first use so importing the API (e.g. in a preloading
+        gunicorn master) opens no MongoDB connections before workers fork.
+        """
+        if self._db is None:
+            with self._db_lock:
+                if self._db is None:
+                    self._db = Database()
+        return self._db
+
+    @db.setter
+    def db(self, value: Optional[Database]):
+        self._db = value
+
+    def _check_password(self, email, password, password_hash) -> bool:
+        """
+        Verifies a password against its stored hash, caching the outcome.
+        The stored hash is part of the key, so a password change never hits a stale entry.
+        """
+        message = f"{email.lower()}:{password}:{password_hash}".encode()
+        key = hmac.new(_LOGIN_PEPPER, message, hashlib.sha256).digest()
+
+        with self._login_cache_lock:
+            cached = self._login_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Slow path: KDF verification (runs outside the lock)
+        result = verify_password(password_hash, password)
+        with self._login_cache_lock:
+            self._login_cache[key] = result
+        return result
 
     def register_user(self, user_data: dict) -> Tuple[bool, str]:
         """
@@ -25,35 +115,32 @@ class AuthService:
         if not email or not password:
             return False, "Email and Password are required."
 
-        # Check if user already exists
-        existing_user = self.db.get_user(email)
-        if existing_user:
-            return False, "User already exists."
-
         # Hash Password
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
         user_data['password_hash'] = password_hash
         del user_data['password'] # Remove plain password
 
-        # Generate OTP
-        otp = generate_otp()
+        # Generate OTP (HOTP: only the secret and counter are stored)
+        otp_secret = generate_otp_secret()
+        otp = generate_hotp(otp_secret, 1)
         expiry = time.time() + 300 # 5 minutes
 
-        user_data['otp'] = otp
+        user_data['otp_secret'] = otp_secret
+        user_data['otp_counter'] = 1
         user_data['otp_expiry'] = expiry
         user_data['is_verified'] = False
 
-        # Create User
-        if self.db.create_user(user_data):
-            # Send Email
-            sent, msg = send_email_otp(email, otp)
-            if sent:
-                return True, "Registration successful. Please verify your email."
-            else:
-                # User created but email failed. Ideally rollback or allow resend.
-                return True, f"Registration successful but email failed: {msg}. Please request resend."
-        
-        return False, "Database error during registration."
+        # Create User (the unique email index rejects duplicates in the same round-trip)
+        if not self.db.create_user(user_data):
+            return False, "User already exists."
+
+        # Send Email
+        sent, msg = send_email_otp(email, otp)
+        if sent:
+            return True, "Registration successful. Please verify your email."
+        else:
+            # User created but email failed. Ideally rollback or allow resend.
+            return True, f"Registration successful but email failed: {msg}. Please request resend."
 
     def login_user(self, email, password) -> Tuple[bool, str, Optional[dict]]:
         """
@@ -64,9 +151,13 @@ class AuthService:
         if not user:
             return False, "Invalid email or password.", None
 
-        if not check_password_hash(user.get('password_hash', ''), password):
+        password_hash = user.get('password_hash', '')
+        if not password or not self._check_password(email, password, password_hash):
             return False, "Invalid email or password.", None
 
+        if password_needs_rehash(password_hash):
+            self.db.update_password_hash(email, hash_password(password))
+
         if not user.get('is_verified'):
             return False, "Account not verified. Please verify your email.", None
 
@@ -81,39 +172,58 @@ class AuthService:
             return False, "User not found."
 
         # ALWAYS check OTP to prevent bypass, even if already verified
-        stored_otp = user.get('otp')
+        otp_secret = user.get('otp_secret')
+        otp_counter = user.get('otp_counter', 0)
         expiry = user.get('otp_expiry', 0)
 
-        if not stored_otp:
+        if not otp_secret or not expiry:
              return False, "No OTP found. Please request a new one."
 
         if time.time() > expiry:
             return False, "OTP has expired. Please request a new one."
 
-        if stored_otp.strip() == otp.strip():
-            if not user.get('is_verified'):
-                 self.db.update_user_verification(email, True)
-            # Clear OTP
-            self.db.store_otp(email, None, 0) 
+        expected_otp = generate_hotp(otp_secret, otp_counter)
+        # Coerce JSON numbers to str and compare bytes: compare_digest rejects non-ASCII str
+        submitted = str(otp if otp is not None else '').strip()
+        if hmac.compare_digest(expected_otp.encode(), submitted.encode()):
+            # Mark verified and invalidate the OTP in one write (the next send advances the counter)
+            self.db.finalize_verification(email)
             return True, "Email verified successfully."
         
         return False, "Invalid OTP."
 
-    def send_login_otp(self, email) -> Tuple[bool, str]:
+    def generate_and_store_otp(self, email) -> Tuple[bool, str, Optional[str]]:
         """
-        Sends OTP for Login (works for verified and unverified).
+        Advances the user's HOTP counter and stores it (fast, DB only).
+        Returns: (Success, Message, OTP)
         """
         user = self.db.get_user(email)
         if not user:
-            return False, "User not found."
+            return False, "User not found.", None
         
-        otp = generate_otp()
+        # Advance the HOTP counter; legacy users get a secret on first send
+        otp_secret = user.get('otp_secret') or generate_otp_secret()
+        otp_counter = user.get('otp_counter', 0) + 1
+        otp = generate_hotp(otp_secret, otp_counter)
         expiry = time.time() + 300 # 5 minutes
         
-        self.db.store_otp(email, otp, expiry)
-        sent, msg = send_email_otp(email, otp)
-        
-        return sent, msg
+        self.db.store_otp(email, otp_secret, otp_counter, expiry)
+        return True, "OTP generated.", otp
+
+    def send_otp_email(self, email, otp) -> Tuple[bool, str]:
+        """
+        Delivers an already-stored OTP by email (slow, SMTP I/O).
+        """
+        return send_email_otp(email, otp)
+
+    def send_login_otp(self, email) -> Tuple[bool, str]:
+        """
+        Sends OTP for Login (works for verified and unverified).
+        """
+        success, msg, otp = self.generate_and_store_otp(email)
+        if not success:
+            return success, msg
+        return self.send_otp_email(email, otp)
 
     def verify_login_otp(self, email, otp) -> Tuple[bool, str, Optional[dict]]:
         """
@@ -121,7 +231,8 @@ class AuthService:
         """
         success, msg = self.verify_email(email, otp)
         if success:
-            user = self.db.get_user(email)
+            # The UI caches the decoded embedding at login, so fetch it with the record
+            user = self.db.get_user(email, include_embedding=True)
             return True, "Login successful.", user
         return False, msg, None
 
@@ -129,12 +240,9 @@ class AuthService:
         """
         Resends OTP to an unverified user.
         """
-        user = self.db.get_user(email)
-        if not user:
-            return False, "User not found."
-        
-        # Now we can just use send_login_otp logic but keep the name for API compatibility
+        # Same flow as send_login_otp; the name is kept for API compatibility
         return self.send_login_otp(email)
 
     def close(self):
-        self.db.close()
+        if self._db is not None:
+            self._db.close()
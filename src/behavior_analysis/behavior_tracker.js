@@ -16,10 +16,17 @@
     const SESSION_ID = getSessionId();
     const API_URL = 'http://localhost:5001/api/behavior';
 
-    // State buffer
+    // State buffer: flat [type, t, value] triples, sent as one Float64Array
+    // (value is dwell time for keys, velocity for mouse moves, 0 otherwise)
+    const EVENT_TYPES = { k: 0, m: 1, b: 2, f: 3, init: 4 };
     let eventBuffer = [];
     const MAX_BUFFER_SIZE = 50;
 
+    const pushEvent = (type, t, value) => {
+        eventBuffer.push(EVENT_TYPES[type], t, value || 0);
+    };
+    const bufferedEvents = () => eventBuffer.length / 3;
+
     // Keystroke state
     let keyTimes = {};
 
@@ -32,19 +39,15 @@
     const flushData = () => {
         if (eventBuffer.length === 0) return;
 
-        const payload = {
-            session_id: SESSION_ID,
-            events: eventBuffer,
-            timestamp: Date.now()
-        };
+        const payload = new Float64Array(eventBuffer);
 
         // Clear buffer immediately to avoid duplicates if async feels slow
         eventBuffer = [];
 
-        fetch(API_URL, {
+        fetch(API_URL + '?session_id=' + encodeURIComponent(SESSION_ID), {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(payload),
+            headers: { 'Content-Type': 'application/octet-stream' },
+            body: payload.buffer,
             keepalive: true // Ensure sends even if page unloads
         }).catch(err => console.error("Behavior tracking error:", err));
     };
@@ -67,16 +70,12 @@
         const downTime = keyTimes[e.code];
         if (downTime) {
             const dwell = now - downTime;
-            eventBuffer.push({
-                type: 'k', // keystroke
-                d: dwell, // dwell time
-                t: now // timestamp
-            });
+            pushEvent('k', now, dwell); // keystroke: timestamp, dwell time
             delete keyTimes[e.code];
         }
 
         // Check buffer
-        if (eventBuffer.length >= MAX_BUFFER_SIZE) flushData();
+        if (bufferedEvents() >= MAX_BUFFER_SIZE) flushData();
     });
 
     // 2. Mouse Dynamics
@@ -90,34 +89,30 @@
                     Math.pow(e.clientY - lastMousePos.y, 2)
                 );
                 mousePath += dist;
-                eventBuffer.push({
-                    type: 'm', // mouse
-                    v: dist / (now - lastMouseTime), // velocity (px/ms)
-                    t: now
-                });
+                pushEvent('m', now, dist / (now - lastMouseTime)); // mouse: velocity (px/ms)
             }
             lastMousePos = { x: e.clientX, y: e.clientY };
             lastMouseTime = now;
 
-            if (eventBuffer.length >= MAX_BUFFER_SIZE) flushData();
+            if (bufferedEvents() >= MAX_BUFFER_SIZE) flushData();
         }
     });
 
     // 3. Focus/Blur (Tab switching)
     window.addEventListener('blur', () => {
-        eventBuffer.push({ type: 'b', t: Date.now() }); // blur
+        pushEvent('b', Date.now()); // blur
         flushData();
     });
 
     window.addEventListener('focus', () => {
-        eventBuffer.push({ type: 'f', t: Date.now() }); // focus
+        pushEvent('f', Date.now()); // focus
     });
 
     // Periodic flush (every 2 seconds to capture end-of-flow data)
     setInterval(flushData, 2000);
 
     // Initial ping
-    eventBuffer.push({ type: 'init', t: Date.now(), agent: navigator.userAgent });
+    pushEvent('init', Date.now());
     flushData();
 
     console.log("Behavioral Analysis Initialized. Session:", SESSION_ID);
@@ -1,17 +1,74 @@
+import os
 import time
+import hashlib
 import threading
+from collections import OrderedDict
 import logging
 import sys
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from scipy.stats import entropy
 
+try:
+    from waitress import serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.WARNING) # Reduced logging
 logger = logging.getLogger(__name__)
 
+# --- Server / Tracker Script ---
+BEHAVIOR_SERVER_PORT = 5001
+BEHAVIOR_SERVER_URL = f"http://localhost:{BEHAVIOR_SERVER_PORT}"
+BEHAVIOR_SERVER_THREADS = 8
+TRACKER_JS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'behavior_tracker.js')
+# The script URL carries a content hash, so browsers can cache it for a long time
+TRACKER_JS_MAX_AGE = 7 * 24 * 3600
+
 # --- In-Memory Storage (Proof of concept) ---
+# Tracker payload: little-endian float64 (type_code, t, value) triples; value is dwell (keys) or velocity (mouse)
+EVENT_KEY, EVENT_MOUSE, EVENT_OTHER = 0, 1, 255
+# JSON payloads are unpacked into the same columns (t, dwell, velocity, kind)
+EVENT_DTYPE = np.dtype([('t', 'f8'), ('d', 'f8'), ('v', 'f8'), ('kind', 'u1')])
+EVENT_KINDS = {'k': EVENT_KEY, 'm': EVENT_MOUSE}
+PACKED_EVENT_DTYPE = np.dtype('<f8')
+VELOCITY_WINDOW = 1000  # mouse velocities kept per session for the entropy histogram
+
+def _keystroke_sums(key_t, key_d, last_key_time):
+    """
+    One pass over a keystroke batch: dwell sums, and flight sums for gaps under 2s.
+    last_key_time is NaN when the session has no previous key.
+    Returns (dwell_sum, dwell_sq_sum, flight_sum, flight_sq_sum, flight_count).
+    """
+    dwell_sum = dwell_sq_sum = flight_sum = flight_sq_sum = 0.0
+    flight_count = 0
+    prev = last_key_time
+    for i in range(key_t.shape[0]):
+        d = key_d[i]
+        dwell_sum += d
+        dwell_sq_sum += d * d
+        t = key_t[i]
+        if prev == prev:  # not NaN
+            flight = t - prev
+            if flight < 2000:
+                flight_sum += flight
+                flight_sq_sum += flight * flight
+                flight_count += 1
+        prev = t
+    return dwell_sum, dwell_sq_sum, flight_sum, flight_sq_sum, flight_count
+
+if NUMBA_AVAILABLE:
+    # Compiled once (cached on disk); releases the GIL so other request threads keep running
+    _keystroke_sums = njit(cache=True, nogil=True)(_keystroke_sums)
 
 # --- Incremental Session Accumulator (Step 2: Real-time Accumulation) ---
 class SessionAccumulator:
@@ -25,45 +82,80 @@ class SessionAccumulator:
         
         self.flight_sum = 0.0
         self.flight_sq_sum = 0.0
+        self.flight_count = 0
         self.last_key_time = None
         
         self.mouse_moves_count = 0
         self.velocity_sum = 0.0
-        self.velocities = [] # Keep velocities for Entropy (hard to do incrementally)
+        # Ring buffer of the latest velocities for Entropy (hard to do incrementally)
+        self._vel_buf = np.empty(VELOCITY_WINDOW, np.float32)
+        self._vel_idx = 0
+        self._vel_count = 0
         
         self.raw_events_count = 0
+        self.last_seen = time.monotonic()
+        # Set once the tracker has posted data; lives and is evicted with the session
+        self.ready = threading.Event()
         
     def add_events(self, events):
+        """Accumulates a batch of JSON event dicts ({'type', 't', 'd'/'v'})"""
+        # One pass over the dicts into a structured array; everything after is column masks
+        batch = np.fromiter(
+            ((e.get('t', 0), e.get('d', 0), e.get('v', 0), EVENT_KINDS.get(e.get('type'), EVENT_OTHER)) for e in events),
+            EVENT_DTYPE, len(events)
+        )
+        keys = batch['kind'] == EVENT_KEY
+        self._accumulate(len(batch), batch['t'][keys], batch['d'][keys], batch['v'][batch['kind'] == EVENT_MOUSE])
+
+    def add_packed(self, packed):
+        """Accumulates a batch of (type_code, t, value) rows as sent by the tracker's binary payload"""
+        kinds = packed[:, 0]
+        keys = packed[kinds == EVENT_KEY]
+        self._accumulate(len(packed), keys[:, 1], keys[:, 2], packed[kinds == EVENT_MOUSE, 2])
+
+    def _accumulate(self, n_events, key_t, key_d, moves_v):
+        # Callers unpack the batch into arrays outside the lock; only the running sums are updated under it
         with self.lock:
-            for e in events:
-                self.raw_events_count += 1
-                t = e.get('t', 0)
-                
-                if e['type'] == 'k':
-                    self.keystroke_count += 1
-                    # Dwell
-                    d = e.get('d', 0)
-                    self.dwell_sum += d
-                    self.dwell_sq_sum += (d * d)
-                    
-                    # Flight (Time since last key)
-                    if self.last_key_time is not None:
-                        flight = t - self.last_key_time
-                        # Filter typing breaks (> 2s)
-                        if flight < 2000:
-                            self.flight_sum += flight
-                            self.flight_sq_sum += (flight * flight)
-                    self.last_key_time = t
-                    
-                elif e['type'] == 'm':
-                    self.mouse_moves_count += 1
-                    v = e.get('v', 0)
-                    self.velocity_sum += v
-                    self.velocities.append(v)
-                    
-            # Cap memory for raw lists
-            if len(self.velocities) > 1000:
-                self.velocities = self.velocities[-1000:]
+            self.raw_events_count += n_events
+
+            if len(key_t) and NUMBA_AVAILABLE:
+                self.keystroke_count += len(key_t)
+                last = np.nan if self.last_key_time is None else self.last_key_time
+                dwell_sum, dwell_sq_sum, flight_sum, flight_sq_sum, flight_count = _keystroke_sums(
+                    np.ascontiguousarray(key_t, np.float64), np.ascontiguousarray(key_d, np.float64), last
+                )
+                self.dwell_sum += dwell_sum
+                self.dwell_sq_sum += dwell_sq_sum
+                self.flight_sum += flight_sum
+                self.flight_sq_sum += flight_sq_sum
+                self.flight_count += flight_count
+                self.last_key_time = float(key_t[-1])
+
+            elif len(key_t):
+                self.keystroke_count += len(key_t)
+                # Dwell
+                self.dwell_sum += key_d.sum()
+                self.dwell_sq_sum += key_d @ key_d
+
+                # Flight (Time since last key), continuing from the previous batch
+                if self.last_key_time is not None:
+                    key_t = np.concatenate(([self.last_key_time], key_t))
+                flights = np.diff(key_t)
+                # Filter typing breaks (> 2s)
+                flights = flights[flights < 2000]
+                self.flight_sum += flights.sum()
+                self.flight_sq_sum += flights @ flights
+                self.flight_count += len(flights)
+                self.last_key_time = key_t[-1]
+
+            if len(moves_v):
+                self.mouse_moves_count += len(moves_v)
+                self.velocity_sum += moves_v.sum()
+                # Overwrite the oldest slots in place; the histogram doesn't care about order
+                moves_v = moves_v[-VELOCITY_WINDOW:]
+                np.put(self._vel_buf, np.arange(self._vel_idx, self._vel_idx + len(moves_v)), moves_v, mode='wrap')
+                self._vel_idx = (self._vel_idx + len(moves_v)) % VELOCITY_WINDOW
+                self._vel_count = min(VELOCITY_WINDOW, self._vel_count + len(moves_v))
 
     def get_snapshot(self):
         with self.lock:
@@ -85,28 +177,55 @@ class SessionAccumulator:
                 variance = (self.dwell_sq_sum / self.keystroke_count) - (stats['avg_dwell_time'] ** 2)
                 stats['dwell_time_std'] = np.sqrt(max(0, variance))
                 
-            # Flight Stats (Note: flight count is approx keystroke_count - 1 - breaks)
-            # Simplified: using approx count derived from logic would be complex count tracking
-            # reusing keystroke_count for demonstration, strictly we should track flight_count separate
-            # Let's trust that flight_sum > 0 implies valid flights
-            if self.flight_sum > 0:
-                 flight_count = max(1, self.keystroke_count - 1) # Approximation
-                 stats['avg_flight_time'] = self.flight_sum / flight_count
-                 variance_f = (self.flight_sq_sum / flight_count) - (stats['avg_flight_time'] ** 2)
+            # Flight Stats (only gaps under the 2s break threshold are counted)
+            if self.flight_count > 0:
+                 stats['avg_flight_time'] = self.flight_sum / self.flight_count
+                 variance_f = (self.flight_sq_sum / self.flight_count) - (stats['avg_flight_time'] ** 2)
                  stats['flight_time_std'] = np.sqrt(max(0, variance_f))
 
             # Mouse Stats
             if self.mouse_moves_count > 0:
                 stats['avg_mouse_velocity'] = self.velocity_sum / self.mouse_moves_count
                 
-                if len(self.velocities) > 5:
-                    hist, _ = np.histogram(self.velocities, bins=10, density=True)
+                if self._vel_count > 5:
+                    hist, _ = np.histogram(self._vel_buf[:self._vel_count], bins=10, density=True)
                     stats['velocity_entropy'] = entropy(hist + 1e-10)
             
             return stats
 
-# Global Storage: Map[session_id, SessionAccumulator]
-BEHAVIOR_SESSIONS = {}
+# Global Storage: Map[session_id, SessionAccumulator], least recently posted first.
+# Bounded by MAX_SESSIONS (LRU) and swept for sessions idle longer than SESSION_IDLE_TIMEOUT.
+MAX_SESSIONS = 10000
+SESSION_IDLE_TIMEOUT = 30 * 60  # seconds
+SESSION_SWEEP_INTERVAL = 60  # seconds
+BEHAVIOR_SESSIONS = OrderedDict()
+_SESSIONS_LOCK = threading.Lock()
+
+def _get_accumulator(session_id):
+    """Returns the session's accumulator (created on first use), marking it most recently used"""
+    with _SESSIONS_LOCK:
+        accumulator = BEHAVIOR_SESSIONS.get(session_id)
+        if accumulator is None:
+            accumulator = BEHAVIOR_SESSIONS[session_id] = SessionAccumulator()
+            while len(BEHAVIOR_SESSIONS) > MAX_SESSIONS:
+                BEHAVIOR_SESSIONS.popitem(last=False)
+        else:
+            BEHAVIOR_SESSIONS.move_to_end(session_id)
+        accumulator.last_seen = time.monotonic()
+        return accumulator
+
+def _sweep_idle_sessions():
+    """Background loop: drops accumulators that have not received events for SESSION_IDLE_TIMEOUT"""
+    while True:
+        time.sleep(SESSION_SWEEP_INTERVAL)
+        cutoff = time.monotonic() - SESSION_IDLE_TIMEOUT
+        with _SESSIONS_LOCK:
+            # LRU order: stop at the first session that is still active
+            while BEHAVIOR_SESSIONS:
+                session_id, accumulator = next(iter(BEHAVIOR_SESSIONS.items()))
+                if accumulator.last_seen >= cutoff:
+                    break
+                del BEHAVIOR_SESSIONS[session_id]
 
 class BehaviorAnalyzer:
     def __init__(self):
@@ -119,6 +238,12 @@ class BehaviorAnalyzer:
         'mouse_velocity': {'mean': 0.5, 'std': 0.3},
         'velocity_entropy': {'mean': 2.0, 'std': 0.5}
     }
+    # Same baselines as arrays (rows in BASELINE_STATS order), for one vectorised z-score
+    BASELINE_MEANS = np.array([base['mean'] for base in BASELINE_STATS.values()])
+    BASELINE_STDS = np.array([base['std'] for base in BASELINE_STATS.values()])
+
+    # Risk rules, in evaluation order: superhuman typing, robotic key press, robotic rhythm, unnatural mouse
+    RULE_WEIGHTS = np.array([0.4, 0.5, 0.3, 0.4])
 
     def compute_z_score(self, value, baseline_key):
         base = self.BASELINE_STATS.get(baseline_key)
@@ -130,7 +255,8 @@ class BehaviorAnalyzer:
         """
         Step 3 & 4: Submission-Time Final Aggregation & Evaluation
         """
-        accumulator = BEHAVIOR_SESSIONS.get(session_id)
+        with _SESSIONS_LOCK:
+            accumulator = BEHAVIOR_SESSIONS.get(session_id)
         if not accumulator or accumulator.raw_events_count == 0:
             return 0.5, "MANUAL_REVIEW", ["No behavioral data collected"]
             
@@ -138,30 +264,31 @@ class BehaviorAnalyzer:
         features = accumulator.get_snapshot()
         
         # Step 4: Single Final Evaluation
-        risk_score = 0.0
-        reasons = []
-
-        # 1. Typing Speed (Z-Score)
-        if features['keystroke_count'] > 5:
-            z_dwell = self.compute_z_score(features['avg_dwell_time'], 'dwell_time')
-            if z_dwell < -2.5: 
-                risk_score += 0.4
-                reasons.append(f"Superhuman Typing Speed (Z={z_dwell:.1f})")
-
-        # 2. Stability / Robotic (Variance)
-        if features['keystroke_count'] > 5:
-            if features['dwell_time_std'] < 5.0:
-                risk_score += 0.5
-                reasons.append("Robotic Key Press Consistency")
-            
-            if features['flight_time_std'] < 10.0 and features['avg_flight_time'] > 0:
-                 risk_score += 0.3
-                 reasons.append("Robotic Typing Rhythm")
+        values = np.array([
+            features['avg_dwell_time'], features['avg_flight_time'],
+            features['avg_mouse_velocity'], features['velocity_entropy']
+        ])
+        z = (values - self.BASELINE_MEANS) / self.BASELINE_STDS
+        z_dwell = z[0]
 
-        # 3. Mouse Entropy
-        if features['mouse_moves_count'] > 10 and features['velocity_entropy'] < 0.5:
-             risk_score += 0.4
-             reasons.append("Unnatural Mouse Movement")
+        typing = features['keystroke_count'] > 5
+        rules = np.array([
+            # 1. Typing Speed (Z-Score)
+            typing and z_dwell < -2.5,
+            # 2. Stability / Robotic (Variance)
+            typing and features['dwell_time_std'] < 5.0,
+            typing and features['flight_time_std'] < 10.0 and features['avg_flight_time'] > 0,
+            # 3. Mouse Entropy
+            features['mouse_moves_count'] > 10 and features['velocity_entropy'] < 0.5,
+        ])
+        rule_reasons = (
+            f"Superhuman Typing Speed (Z={z_dwell:.1f})",
+            "Robotic Key Press Consistency",
+            "Robotic Typing Rhythm",
+            "Unnatural Mouse Movement",
+        )
+        risk_score = float(self.RULE_WEIGHTS @ rules)
+        reasons = [reason for reason, hit in zip(rule_reasons, rules) if hit]
 
         # Step 5: Final Decision Logic
         risk_score = min(1.0, risk_score)
@@ -199,33 +326,68 @@ class BehaviorServer:
         @self._app.route('/api/behavior', methods=['POST'])
         def receive_behavior():
             try:
-                content = request.json
-                session_id = content.get('session_id')
-                events = content.get('events', [])
+                if request.mimetype == 'application/octet-stream':
+                    # Binary batch: decoded straight into an (N, 3) view, no per-event dicts
+                    session_id = request.args.get('session_id')
+                    raw = request.get_data()
+                    batch = np.frombuffer(raw, PACKED_EVENT_DTYPE, len(raw) // 24 * 3).reshape(-1, 3)
+                else:
+                    content = request.get_json(force=True, silent=True) or {}
+                    session_id = content.get('session_id')
+                    batch = content.get('events', [])
                 
                 if session_id:
-                    if session_id not in BEHAVIOR_SESSIONS:
-                        BEHAVIOR_SESSIONS[session_id] = SessionAccumulator()
+                    accumulator = _get_accumulator(session_id)
                     
                     # Step 2: Real-Time Feature Accumulation
-                    BEHAVIOR_SESSIONS[session_id].add_events(events)
+                    if isinstance(batch, np.ndarray):
+                        accumulator.add_packed(batch)
+                    else:
+                        accumulator.add_events(batch)
+                    # Wake any submit waiting on this session's first batch
+                    accumulator.ready.set()
 
                 return jsonify({"status": "ok"}), 200
             except Exception as e:
                 logger.error(f"Error in behavior API: {e}")
                 return jsonify({"status": "error", "message": str(e)}), 500
 
+        with open(TRACKER_JS_PATH, 'rb') as f:
+            self._tracker_version = hashlib.md5(f.read()).hexdigest()[:12]
+
+        @self._app.route('/static/behavior_tracker.js', methods=['GET'])
+        def tracker_script():
+            return send_file(TRACKER_JS_PATH, mimetype='application/javascript', max_age=TRACKER_JS_MAX_AGE)
+
         def run_app():
             try:
-                self._app.run(port=5001, debug=False, use_reloader=False)
+                if WAITRESS_AVAILABLE:
+                    # Production WSGI server: a pool of worker threads handles concurrent tabs
+                    serve(self._app, host='127.0.0.1', port=BEHAVIOR_SERVER_PORT, threads=BEHAVIOR_SERVER_THREADS)
+                else:
+                    self._app.run(port=BEHAVIOR_SERVER_PORT, debug=False, use_reloader=False, threaded=True)
             except Exception as e:
                 logger.error(f"Failed to start Behavior Server: {e}")
 
+        if NUMBA_AVAILABLE:
+            # Compile (or load from cache) now, not on the first tracker request
+            _keystroke_sums(np.zeros(1), np.zeros(1), np.nan)
+
         self._thread = threading.Thread(target=run_app, daemon=True)
         self._thread.start()
-        logger.info("Behavior Analysis Background Server started on port 5001")
+        threading.Thread(target=_sweep_idle_sessions, name="behavior-session-sweeper", daemon=True).start()
+        logger.info(f"Behavior Analysis Background Server started on port {BEHAVIOR_SERVER_PORT}")
 
+    def tracker_script_url(self):
+        """Versioned URL of the tracker script served by this server"""
+        return f"{BEHAVIOR_SERVER_URL}/static/behavior_tracker.js?v={self._tracker_version}"
 
-    def get_score(self, session_id):
+
+    def get_score(self, session_id, timeout=1.5):
+        """
+        Scores the session, waiting up to `timeout` seconds for the tracker's
+        first batch if nothing has arrived yet (returns immediately otherwise).
+        """
+        _get_accumulator(session_id).ready.wait(timeout)
         analyzer = BehaviorAnalyzer()
         return analyzer.calculate_risk_score(session_id)
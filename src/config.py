@@ -10,6 +10,13 @@ UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "doc_verification", "upl
 # Database
 DB_PATH = os.path.join(DATA_DIR, "kyc_database.db")
 
+# MongoDB connection pool (size it to the number of concurrent workers/threads)
+MONGO_POOL_SIZE = int(os.getenv("MONGO_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+
+# KYC attempt logs older than this are removed by a MongoDB TTL index (0 = keep forever)
+KYC_LOG_RETENTION_DAYS = int(os.getenv("KYC_LOG_RETENTION_DAYS", "30"))
+
 # Thresholds
 FACE_MATCH_THRESHOLD = 0.40  # Cosine similarity
 FRAUD_PROBABILITY_THRESHOLD = 0.75
@@ -22,8 +29,20 @@ FLASK_CONFIG = {
     'max_content_length': 16 * 1024 * 1024  # 16MB max file size
 }
 
-# Create dirs if not exist
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(MODELS_DIR, exist_ok=True)
-os.makedirs(STATIC_FOLDER, exist_ok=True)
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Create dirs if not exist (once per process; plain mkdir skips makedirs' extra stat calls)
+_DIRS_READY = False
+
+def _ensure_dirs():
+    global _DIRS_READY
+    if _DIRS_READY:
+        return
+    for path in (DATA_DIR, MODELS_DIR, STATIC_FOLDER, UPLOAD_FOLDER):
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            os.makedirs(path, exist_ok=True)  # missing parent
+    _DIRS_READY = True
+
+_ensure_dirs()
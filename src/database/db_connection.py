@@ -1,37 +1,212 @@
 import os
+import atexit
+import threading
+from collections import deque
 import pymongo
+import numpy as np
 from dotenv import load_dotenv
 import datetime
 import dns.resolver
+from bson import ObjectId
+from pymongo.write_concern import WriteConcern
+from src.config import MONGO_POOL_SIZE, MONGO_MIN_POOL_SIZE, KYC_LOG_RETENTION_DAYS
 
-# Load env variables
+# Load env variables (read once at import; get_client() raises if the URI is missing)
 load_dotenv()
+_MONGODB_URI = os.getenv("MONGODB_URI")
 
 # --- DNS FIX FOR VPN/RESTRICTED NETWORKS ---
 # Force dnspython to use Google DNS instead of failing local DNS
 dns.resolver.default_resolver = dns.resolver.Resolver(configure=False)
 dns.resolver.default_resolver.nameservers = ['8.8.8.8', '8.8.4.4'] 
 
+# User lookups skip the binary embedding unless the caller is matching faces
+WITHOUT_EMBEDDING = {"face_embedding": 0}
+EMBEDDING_FIELDS = {"_id": 0, "face_embedding": 1, "embedding_dtype": 1, "embedding_normalized": 1}
+
+# Attempt logs are non-critical: acknowledge on the primary without waiting for the journal
+LOG_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# Fields never shipped to the Admin Dashboard (binary / sensitive data)
+ADMIN_HIDDEN_FIELDS = {
+    "_id": 0, "face_embedding": 0, "behavior_baseline": 0, "password_hash": 0,
+    "otp_secret": 0, "otp_counter": 0, "otp_expiry": 0,
+}
+
+# --- Shared Connection Pool ---
+# One MongoClient per process. It is thread-safe and pools sockets, so every
+# Database() reuses it instead of paying TCP + TLS + auth on each request.
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client():
+    """Returns the process-wide MongoClient, creating it on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                if not _MONGODB_URI:
+                    raise ValueError("MONGODB_URI not found in .env file")
+                _CLIENT = pymongo.MongoClient(
+                    _MONGODB_URI,
+                    maxPoolSize=MONGO_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    waitQueueTimeoutMS=2000,
+                    socketTimeoutMS=5000,
+                    serverSelectionTimeoutMS=3000,
+                    retryWrites=True,
+                    connect=False  # connect lazily on first operation (fork-friendly, no import-time I/O)
+                )
+    return _CLIENT
+
+
+def reset_client():
+    """
+    Drops the inherited MongoClient after a fork (e.g. gunicorn --preload).
+    PyMongo clients are not fork-safe; the next get_client() builds a fresh pool.
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        _CLIENT = None
+
+
+def to_bson_safe(value):
+    """
+    Recursively converts NumPy scalars/arrays (and tuples) in a result dict to
+    plain Python types so PyMongo can store it as a native sub-document.
+    """
+    if isinstance(value, dict):
+        return {str(k): to_bson_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_bson_safe(v) for v in value]
+    if isinstance(value, (np.bool_, np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+# --- Batched KYC Attempt Logging ---
+# Attempts are queued and written by one background thread with insert_many,
+# so a verify click never waits on a log round-trip.
+LOG_BATCH_SIZE = 50
+LOG_FLUSH_INTERVAL = 2.0  # seconds
+_LOG_QUEUE = deque()
+_LOG_WAKE = threading.Event()
+_LOG_THREAD = None
+_LOG_THREAD_LOCK = threading.Lock()
+
+
+def flush_kyc_logs():
+    """Writes every queued attempt in one unordered insert_many."""
+    batch = []
+    while _LOG_QUEUE:
+        batch.append(_LOG_QUEUE.popleft())
+    if not batch:
+        return
+    try:
+        logs = get_client()["kyc_fraud_detection"].get_collection("kyc_attempts", write_concern=LOG_WRITE_CONCERN)
+        logs.insert_many(batch, ordered=False)
+    except pymongo.errors.PyMongoError as e:
+        print(f"Error writing {len(batch)} KYC log(s): {e}")
+
+
+def _log_writer():
+    while True:
+        _LOG_WAKE.wait(LOG_FLUSH_INTERVAL)
+        _LOG_WAKE.clear()
+        flush_kyc_logs()
+
+
+def _ensure_log_writer():
+    global _LOG_THREAD
+    # is_alive() is also False in a forked child, which gets its own writer
+    if _LOG_THREAD is None or not _LOG_THREAD.is_alive():
+        with _LOG_THREAD_LOCK:
+            if _LOG_THREAD is None or not _LOG_THREAD.is_alive():
+                _LOG_THREAD = threading.Thread(target=_log_writer, name="kyc-log-writer", daemon=True)
+                _LOG_THREAD.start()
+
+
+# Don't lose queued attempts on a clean shutdown
+atexit.register(flush_kyc_logs)
+
+
+_INDEXES_READY = False
+_INDEXES_LOCK = threading.Lock()
+# False if the unique email index could not be built; create_user then pre-checks duplicates itself
+_EMAIL_INDEX_UNIQUE = False
+
+
+def _bootstrap(database):
+    """Creates indexes for uniqueness and speed, once per process rather than per Database()."""
+    global _INDEXES_READY, _EMAIL_INDEX_UNIQUE
+    if _INDEXES_READY:
+        return
+    with _INDEXES_LOCK:
+        if _INDEXES_READY:
+            return
+        try:
+            database.users.create_index("email", unique=True)
+            _EMAIL_INDEX_UNIQUE = True
+        except pymongo.errors.OperationFailure as e:
+            # e.g. existing duplicate emails; registration falls back to a find_one pre-check
+            print(f"[ERROR] Unique email index could not be created, duplicate checks fall back to lookups: {e}")
+        # Each index in its own try, so one failure (e.g. an index with the same name but
+        # different options created by hand) doesn't skip the others
+        secondary_indexes = (
+            ("users (role, created_at)", lambda: database.users.create_index(
+                [("role", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)])),
+            ("kyc_attempts (timestamp, _id)", lambda: _ensure_log_keyset_index(database)),
+            ("kyc_attempts TTL", lambda: _ensure_log_ttl_index(database)),
+        )
+        for name, create in secondary_indexes:
+            try:
+                create()
+            except pymongo.errors.OperationFailure as e:
+                print(f"Index creation skipped ({name}): {e}")
+        _INDEXES_READY = True
+
+
+def _ensure_log_keyset_index(database):
+    """Newest-first (timestamp, _id) index: serves the admin keyset pages, _id breaking timestamp ties."""
+    database.kyc_attempts.create_index([("timestamp", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+
+
+def _ensure_log_ttl_index(database):
+    """
+    Single-key timestamp TTL index when retention is set (TTL indexes can't be compound).
+    Without retention the (timestamp, _id) index already covers every timestamp query.
+    """
+    if not KYC_LOG_RETENTION_DAYS:
+        return
+    keys = [("timestamp", pymongo.DESCENDING)]
+    ttl = KYC_LOG_RETENTION_DAYS * 86400
+    try:
+        database.kyc_attempts.create_index(keys, expireAfterSeconds=ttl)
+    except pymongo.errors.OperationFailure:
+        # Existing deployments already have the plain index on the same key: add the TTL in place
+        database.db.command("collMod", "kyc_attempts", index={"keyPattern": {"timestamp": -1}, "expireAfterSeconds": ttl})
+
+
 class Database:
     def __init__(self):
-        # MongoDB Connection
-        self.uri = os.getenv("MONGODB_URI")
-        if not self.uri:
-             raise ValueError("MONGODB_URI not found in .env file")
-        
-        self.client = pymongo.MongoClient(self.uri)
+        # MongoDB Connection (shared pool)
+        self.client = get_client()
         self.db = self.client["kyc_fraud_detection"]
         self.users = self.db["users"]
         self.kyc_attempts = self.db["kyc_attempts"]
         
-        # Create Indexes for uniqueness and speed
-        self.users.create_index("email", unique=True)
+        _bootstrap(self)
 
     def create_user(self, user_data):
         """
         Inserts a new user into MongoDB.
+        Returns False if the email is already registered (unique index).
         user_data: dict containing full_name, email, dob, phone, password_hash, 
-                   face_embedding (binary), behavior_baseline, role, created_at, is_verified, otp, otp_expiry
+                   face_embedding (binary), behavior_baseline, role, created_at, is_verified,
+                   otp_secret, otp_counter, otp_expiry
         """
         user_data['created_at'] = datetime.datetime.now()
         # Ensure default fields if not present
@@ -40,6 +215,8 @@ class Database:
         if 'role' not in user_data:
             user_data['role'] = 'user'
             
+        if not _EMAIL_INDEX_UNIQUE and self.users.find_one({"email": user_data.get('email')}, {"_id": 1}):
+            return False
         try:
             self.users.insert_one(user_data)
             return True
@@ -54,36 +231,96 @@ class Database:
         )
         return result.modified_count > 0
 
-    def store_otp(self, email, otp, expiry_time):
-        """Stores OTP and its expiry for a user."""
+    def update_password_hash(self, email, password_hash):
+        """Replaces a user's stored password hash (used to upgrade legacy hashes)."""
+        result = self.users.update_one(
+            {"email": email},
+            {"$set": {"password_hash": password_hash}}
+        )
+        return result.modified_count > 0
+
+    def store_otp(self, email, otp_secret, otp_counter, expiry_time):
+        """
+        Stores the HOTP secret, counter and expiry for a user.
+        The OTP itself is derived from these and never persisted.
+        """
+        result = self.users.update_one(
+            {"email": email},
+            {
+                "$set": {"otp_secret": otp_secret, "otp_counter": otp_counter, "otp_expiry": expiry_time},
+                "$unset": {"otp": ""}
+            }
+        )
+        return result.modified_count > 0
+
+    def finalize_verification(self, email):
+        """Marks the user verified and invalidates the current OTP in a single write."""
         result = self.users.update_one(
             {"email": email},
-            {"$set": {"otp": otp, "otp_expiry": expiry_time}}
+            {"$set": {"is_verified": True, "otp_expiry": 0}}
+        )
+        return result.modified_count > 0
+
+    def expire_otp(self, email):
+        """Invalidates the current OTP for a user."""
+        result = self.users.update_one(
+            {"email": email},
+            {"$set": {"otp_expiry": 0}}
         )
         return result.modified_count > 0
 
     def get_user_otp(self, email):
-        """Retrieves OTP and expiry for a user."""
-        user = self.users.find_one({"email": email}, {"otp": 1, "otp_expiry": 1, "_id": 0})
+        """Retrieves HOTP state and expiry for a user."""
+        user = self.users.find_one({"email": email}, {"otp_secret": 1, "otp_counter": 1, "otp_expiry": 1, "_id": 0})
         return user if user else None
 
-    def get_user(self, email):
+    def get_user(self, email, include_embedding=False):
         """
         Fetches user by email (username).
+        The binary face embedding is left out unless include_embedding is set.
         Returns: dict or None
         """
-        return self.users.find_one({"email": email})
+        return self.users.find_one({"email": email}, None if include_embedding else WITHOUT_EMBEDDING)
+
+    def get_user_embedding(self, email):
+        """
+        Fetches only the stored face embedding (and how it was packed) for face matching.
+        Returns: dict or None
+        """
+        return self.users.find_one({"email": email}, EMBEDDING_FIELDS)
 
     def get_user_by_credentials(self, email):
         """
         Fetches user by email to verify credentials. 
         Password check should be done by the service using hash.
         """
-        return self.users.find_one({"email": email})
+        return self.users.find_one({"email": email}, WITHOUT_EMBEDDING)
 
-    def get_all_users(self):
-        """Returns list of all users for Admin Dashboard"""
-        return list(self.users.find({}, {"_id": 0, "face_embedding": 0})) # Exclude binary data for display
+    def get_all_users(self, projection=None, limit=0):
+        """
+        Returns list of all users for Admin Dashboard.
+        projection: optional Mongo projection; defaults to hiding binary/sensitive fields.
+        limit: maximum number of users to return (0 = no limit).
+        """
+        return list(self.users.find({}, projection or ADMIN_HIDDEN_FIELDS, limit=limit))
+
+    def get_users_page(self, skip=0, limit=50, projection=None):
+        """
+        Returns one page of users (by role, newest first) for the Admin Dashboard.
+        projection: optional list of fields to fetch; binary data is never returned.
+        """
+        if projection:
+            fields = {field: 1 for field in projection}
+            fields["_id"] = 0
+        else:
+            fields = ADMIN_HIDDEN_FIELDS
+        # Sort matches the {role, created_at} index, so no in-memory sort
+        cursor = self.users.find({}, fields).sort([("role", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)])
+        return list(cursor.skip(skip).limit(limit))
+
+    def count_users(self):
+        """Fast (metadata-based) total user count."""
+        return self.users.estimated_document_count()
 
     def log_kyc_attempt(self, attempt_data):
         """
@@ -91,13 +328,58 @@ class Database:
         attempt_data: dict
         """
         attempt_data['timestamp'] = datetime.datetime.now()
-        self.kyc_attempts.insert_one(attempt_data)
+        self.kyc_attempts.with_options(write_concern=LOG_WRITE_CONCERN).insert_one(attempt_data)
+
+    def queue_kyc_attempt(self, attempt_data):
+        """
+        Queues a verification attempt for the background batch writer (returns immediately).
+        attempt_data: dict
+        """
+        attempt_data['timestamp'] = datetime.datetime.now()
+        _LOG_QUEUE.append(attempt_data)
+        _ensure_log_writer()
+        if len(_LOG_QUEUE) >= LOG_BATCH_SIZE:
+            _LOG_WAKE.set()
+
+    def get_all_logs(self, limit=0):
+        """Returns verification attempts, newest first (limit 0 = all)."""
+        cursor = self.kyc_attempts.find({}, {"_id": 0}, limit=limit).sort("timestamp", pymongo.DESCENDING)
+        return list(cursor)
+
+    def get_logs_page(self, skip=0, limit=50, projection=None, before=None):
+        """
+        Returns one page of verification attempts, newest first.
+        projection: optional list of fields to fetch (e.g. to leave out the bulky details).
+        before: keyset cursor (timestamp, _id as str) of the last attempt on the previous page.
+                Seeks on the (timestamp, _id) index instead of skipping rows; _id breaks ties
+                so attempts sharing the boundary timestamp are not lost.
+        Rows always include _id (as str) so the caller can build the next cursor.
+        """
+        fields = {field: 1 for field in projection} if projection else None
+        query = {}
+        if before is not None:
+            before_ts, before_id = before
+            query = {
+                "timestamp": {"$lte": before_ts},
+                "$or": [{"timestamp": {"$lt": before_ts}}, {"_id": {"$lt": ObjectId(before_id)}}],
+            }
+        cursor = self.kyc_attempts.find(query, fields).sort(
+            [("timestamp", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+        )
+        if before is None:
+            cursor = cursor.skip(skip)
+        logs = list(cursor.limit(limit))
+        for log in logs:
+            log["_id"] = str(log["_id"])
+        return logs
 
-    def get_all_logs(self):
-        return list(self.kyc_attempts.find({}, {"_id": 0}))
+    def count_logs(self):
+        """Fast (metadata-based) total attempt count."""
+        return self.kyc_attempts.estimated_document_count()
 
     def close(self):
-        self.client.close()
+        """No-op: the pooled client is shared and lives for the whole process."""
+        pass
 
 
 # ==============================================================================
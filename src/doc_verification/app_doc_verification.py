@@ -8,30 +8,62 @@ Endpoints:
 
 import os
 import sys
-import uuid
 import json
+from functools import lru_cache
 from flask import Flask, request, jsonify, send_from_directory
 from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
 import cv2
 import numpy as np
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import FLASK_CONFIG, UPLOAD_FOLDER, STATIC_FOLDER
 from doc_verification import DocumentVerifier
+from doc_verification.config import QUALITY_CONFIG
+
+
+# Exact numpy type -> converter; one dict lookup instead of isinstance checks per value
+_NP_CONVERTERS = {
+    np.bool_: bool,
+    np.int8: int, np.int16: int, np.int32: int, np.int64: int,
+    np.uint8: int, np.uint16: int, np.uint32: int, np.uint64: int,
+    np.float16: float, np.float32: float, np.float64: float,
+    np.ndarray: np.ndarray.tolist,
+}
 
 
 class NumpyJSONProvider(DefaultJSONProvider):
     """Custom JSON provider to handle numpy types"""
-    def default(self, o):
+    @staticmethod
+    def default(o):
+        convert = _NP_CONVERTERS.get(type(o))
+        if convert is not None:
+            return convert(o)
+        # Less common numpy types (subclasses, longdouble, ...)
         if isinstance(o, (np.bool_, np.integer, np.floating)):
             return o.item()
         elif isinstance(o, np.ndarray):
             return o.tolist()
-        return super().default(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        """Encode with orjson when installed (numpy arrays/scalars natively); else the stdlib path"""
+        if not ORJSON_AVAILABLE:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
 
 # Initialize Flask app
 app = Flask(__name__, 
@@ -49,12 +81,33 @@ app.config['MAX_CONTENT_LENGTH'] = FLASK_CONFIG['max_content_length']
 # Allowed extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff'}
 
-# Create upload folder if not exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(STATIC_FOLDER, exist_ok=True)
+# Upload and static folders are created by config on import
+
+@lru_cache(maxsize=1)
+def get_verifier():
+    """
+    Process-wide DocumentVerifier, built on first use so importing the app stays cheap.
+    Call it once before forking (e.g. gunicorn --preload) to share the model weights across workers.
+    """
+    return DocumentVerifier()
+
+
+# Uploads above this size are decoded at half resolution (libjpeg skips the unneeded IDCT work)
+REDUCED_DECODE_BYTES = 2_000_000
 
-# Initialize verifier
-verifier = DocumentVerifier()
+
+def decode_image(buf):
+    """
+    Decode an uploaded image buffer to BGR. Large uploads use IMREAD_REDUCED_COLOR_2,
+    falling back to a full decode if the half-size image would fail the resolution check.
+    """
+    arr = np.frombuffer(buf, np.uint8)
+    if len(buf) > REDUCED_DECODE_BYTES:
+        image = cv2.imdecode(arr, cv2.IMREAD_REDUCED_COLOR_2)
+        min_width, min_height = QUALITY_CONFIG['min_resolution']
+        if image is not None and image.shape[1] >= min_width and image.shape[0] >= min_height:
+            return image
+    return cv2.imdecode(arr, cv2.IMREAD_COLOR)
 
 
 def allowed_file(filename):
@@ -115,13 +168,8 @@ def verify_document():
         }), 400
     
     try:
-        # Save file temporarily
-        filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Read image
-        image = cv2.imread(filepath)
+        # Decode straight from the request body; nothing is written to disk
+        image = decode_image(file.read())
         if image is None:
             return jsonify({
                 'error': 'Could not read image',
@@ -138,23 +186,11 @@ def verify_document():
             }
         
         # Run verification
-        result = verifier.verify_document(image, user_data)
-        
-        # Clean up - delete uploaded file
-        try:
-            os.remove(filepath)
-        except:
-            pass
+        result = get_verifier().verify_document(image, user_data)
         
         return jsonify(result)
     
     except Exception as e:
-        # Clean up on error
-        try:
-            os.remove(filepath)
-        except:
-            pass
-        
         return jsonify({
             'error': 'Verification failed',
             'message': str(e)
@@ -190,9 +226,7 @@ def verify_base64():
         if ',' in image_data:  # Handle data URL format
             image_data = image_data.split(',')[1]
         
-        image_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        image = decode_image(base64.b64decode(image_data))
         
         if image is None:
             return jsonify({
@@ -210,7 +244,7 @@ def verify_base64():
             }
         
         # Run verification
-        result = verifier.verify_document(image, user_data)
+        result = get_verifier().verify_document(image, user_data)
         
         return jsonify(result)
     
@@ -237,7 +271,10 @@ if __name__ == '__main__':
     print(f"📍 Running on: http://localhost:{FLASK_CONFIG['port']}")
     print(f"📁 Upload folder: {UPLOAD_FOLDER}")
     print("="*50 + "\n")
-    
+
+    # Load the models before accepting requests
+    get_verifier()
+
     app.run(
         host=FLASK_CONFIG['host'],
         port=FLASK_CONFIG['port'],
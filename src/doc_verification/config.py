@@ -4,6 +4,7 @@ All thresholds and settings in one place
 """
 
 import os
+import re
 
 # =============================================================================
 # PATHS
@@ -45,21 +46,22 @@ OCR_CONFIG = {
 # =============================================================================
 # ID DOCUMENT PATTERNS (Regex)
 # =============================================================================
-ID_PATTERNS = {
+# Compiled once at import; callers use pattern.search()/finditer() directly
+ID_PATTERNS = {k: re.compile(v) for k, v in {
     'aadhaar': r'\b\d{4}\s?\d{4}\s?\d{4}\b',
     'pan': r'\b[A-Z]{5}\d{4}[A-Z]\b',
     'passport': r'\b[A-Z]\d{7}\b',
     'driving_license': r'\b[A-Z]{2}\d{2}\s?\d{11}\b',
     'voter_id': r'\b[A-Z]{3}\d{7}\b',
-}
+}.items()}
 
-DATE_PATTERNS = [
+DATE_PATTERNS = [re.compile(p) for p in (
     r'\d{2}/\d{2}/\d{4}',
     r'\d{2}-\d{2}-\d{4}',
     r'\d{4}/\d{2}/\d{2}',
     r'\d{4}-\d{2}-\d{2}',
     r'\d{2}\s+\w+\s+\d{4}',
-]
+)]
 
 # =============================================================================
 # RULE ENGINE THRESHOLDS
@@ -27,10 +27,16 @@ class DocumentQualityChecker:
     def __init__(self):
         self.config = QUALITY_CONFIG
     
-    def check_blur(self, image: np.ndarray) -> Tuple[float, bool]:
+    @staticmethod
+    def _to_gray(image: np.ndarray) -> np.ndarray:
+        return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def check_blur(self, image: np.ndarray, gray: np.ndarray = None) -> Tuple[float, bool]:
         """Detect blur using Laplacian variance"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+        if gray is None:
+            gray = self._to_gray(image)
+        _, std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_32F))
+        laplacian_var = float(std[0, 0]) ** 2
         threshold = self.config['blur_threshold']
         blur_score = min(laplacian_var / threshold, 1.0)
         is_sharp = laplacian_var >= threshold
@@ -46,10 +52,11 @@ class DocumentQualityChecker:
         meets_minimum = width >= min_width and height >= min_height
         return resolution_score, meets_minimum
     
-    def check_brightness(self, image: np.ndarray) -> Tuple[float, bool]:
+    def check_brightness(self, image: np.ndarray, gray: np.ndarray = None,
+                         avg_brightness: float = None) -> Tuple[float, bool]:
         """Check if image has good brightness"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        avg_brightness = np.mean(gray)
+        if avg_brightness is None:
+            avg_brightness = float(np.mean(self._to_gray(image) if gray is None else gray))
         min_bright = self.config['min_brightness']
         max_bright = self.config['max_brightness']
         is_good = min_bright <= avg_brightness <= max_bright
@@ -58,9 +65,10 @@ class DocumentQualityChecker:
         brightness_score = max(1.0 - deviation, 0.0)
         return brightness_score, is_good
     
-    def check_borders(self, image: np.ndarray) -> Tuple[float, bool]:
+    def check_borders(self, image: np.ndarray, gray: np.ndarray = None) -> Tuple[float, bool]:
         """Check if document has proper margins"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if gray is None:
+            gray = self._to_gray(image)
         height, width = gray.shape
         edges = cv2.Canny(gray, 50, 150)
         margin = int(min(width, height) * self.config['border_threshold'])
@@ -85,10 +93,11 @@ class DocumentQualityChecker:
         border_score = max(1.0 - avg_edge_density * 2, 0.0)
         return border_score, has_margins
     
-    def check_contrast(self, image: np.ndarray) -> Tuple[float, bool]:
+    def check_contrast(self, image: np.ndarray, gray: np.ndarray = None,
+                       contrast: float = None) -> Tuple[float, bool]:
         """Check image contrast"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        contrast = gray.std()
+        if contrast is None:
+            contrast = float((self._to_gray(image) if gray is None else gray).std())
         min_contrast = 40
         is_good = contrast >= min_contrast
         contrast_score = min(contrast / 80, 1.0)
@@ -96,11 +105,16 @@ class DocumentQualityChecker:
     
     def get_quality_score(self, image: np.ndarray) -> Dict:
         """Calculate overall document quality score"""
-        blur_score, is_sharp = self.check_blur(image)
+        # One grayscale conversion and one mean/std pass shared by every check
+        gray = self._to_gray(image)
+        mean, std = cv2.meanStdDev(gray)
+        avg_brightness, contrast = float(mean[0, 0]), float(std[0, 0])
+
+        blur_score, is_sharp = self.check_blur(image, gray)
         resolution_score, meets_resolution = self.check_resolution(image)
-        brightness_score, good_brightness = self.check_brightness(image)
-        border_score, has_margins = self.check_borders(image)
-        contrast_score, good_contrast = self.check_contrast(image)
+        brightness_score, good_brightness = self.check_brightness(image, gray, avg_brightness)
+        border_score, has_margins = self.check_borders(image, gray)
+        contrast_score, good_contrast = self.check_contrast(image, gray, contrast)
         
         weights = {
             'blur': 0.30,
@@ -23,6 +23,21 @@ except ImportError:
     TESSERACT_AVAILABLE = False
 
 
+# Fixed patterns used per document, compiled once
+NAME_LABEL_RE = re.compile(r'(?:Name|नाम)', re.IGNORECASE)
+LONG_DIGITS_RE = re.compile(r'\d{4,}')
+WHITESPACE_RE = re.compile(r'\s+')
+NON_NAME_CHARS_RE = re.compile(r'[^A-Za-z\s\-\']')
+NAME_FILTER_WORDS_RE = re.compile(
+    r'\b(?:government|india|aadhaar|income|tax|department|ministry|state|male|female|mr|mrs|miss|ms)\b',
+    re.IGNORECASE
+)
+DOB_LABEL_RE = re.compile(r'(?:DOB|D\.?O\.?B|Date of Birth|Birth)', re.IGNORECASE)
+DATE_8DIGIT_RE = re.compile(r'\b(\d{2})(\d{2})(\d{4})\b')
+AADHAAR_LOOSE_RE = re.compile(r'\b(\d{4}[\s\-]?\d{4}[\s\-]?\d{4})\b')
+PAN_RE = re.compile(r'\b([A-Z]{5}\d{4}[A-Z])\b')
+
+
 class OCRExtractor:
     """Tesseract-based OCR for ID document text extraction"""
     
@@ -85,7 +100,7 @@ class OCRExtractor:
         cleaned_lines = [line.strip() for line in lines if line.strip()]
         
         for i, line in enumerate(cleaned_lines):
-            if re.search(r'(?:Name|नाम)', line, re.IGNORECASE):
+            if NAME_LABEL_RE.search(line):
                 if ':' in line:
                     name = line.split(':', 1)[1].strip()
                     if name and len(name) > 2:
@@ -104,7 +119,7 @@ class OCRExtractor:
         for line in cleaned_lines:
             if len(line) < 5 or len(line) > 50:
                 continue
-            if re.search(r'\d{4,}', line):
+            if LONG_DIGITS_RE.search(line):
                 continue
             
             alpha_space_count = sum(1 for c in line if c.isalpha() or c.isspace())
@@ -129,13 +144,11 @@ class OCRExtractor:
         if not name:
             return None
         
-        name = re.sub(r'\s+', ' ', name).strip()
-        name = re.sub(r'[^A-Za-z\s\-\']', '', name)
+        name = WHITESPACE_RE.sub(' ', name).strip()
+        name = NON_NAME_CHARS_RE.sub('', name)
         
-        filter_words = ['government', 'india', 'aadhaar', 'income', 'tax', 'department', 
-                       'ministry', 'state', 'male', 'female', 'mr', 'mrs', 'miss', 'ms']
-        for word in filter_words:
-            name = re.sub(r'\b' + word + r'\b', '', name, flags=re.IGNORECASE)
+        # Drop document/honorific words (one alternation instead of a sub per word)
+        name = NAME_FILTER_WORDS_RE.sub('', name)
         
         name = name.strip()
         
@@ -149,24 +162,24 @@ class OCRExtractor:
         lines = text.split('\n')
         
         for i, line in enumerate(lines):
-            if re.search(r'(?:DOB|D\.?O\.?B|Date of Birth|Birth)', line, re.IGNORECASE):
+            if DOB_LABEL_RE.search(line):
                 search_text = line + ' ' + (lines[i+1] if i+1 < len(lines) else '')
                 
                 for pattern in self.date_patterns:
-                    match = re.search(pattern, search_text)
+                    match = pattern.search(search_text)
                     if match:
                         parsed = self._parse_date(match.group())
                         if parsed:
                             return parsed
         
         for pattern in self.date_patterns:
-            match = re.search(pattern, text)
+            match = pattern.search(text)
             if match:
                 parsed = self._parse_date(match.group())
                 if parsed:
                     return parsed
         
-        date_8digit = re.search(r'\b(\d{2})(\d{2})(\d{4})\b', text)
+        date_8digit = DATE_8DIGIT_RE.search(text)
         if date_8digit:
             try:
                 day, month, year = date_8digit.groups()
@@ -202,7 +215,7 @@ class OCRExtractor:
         text_upper = text.upper()
         
         for id_type, pattern in self.id_patterns.items():
-            matches = re.finditer(pattern, text_upper)
+            matches = pattern.finditer(text_upper)
             for match in matches:
                 found_id = match.group().strip()
                 if found_id and len(found_id) > 5:
@@ -210,11 +223,11 @@ class OCRExtractor:
                     break
         
         if not found_ids:
-            aadhaar = re.search(r'\b(\d{4}[\s\-]?\d{4}[\s\-]?\d{4})\b', text)
+            aadhaar = AADHAAR_LOOSE_RE.search(text)
             if aadhaar:
                 found_ids['aadhaar'] = aadhaar.group(1).replace(' ', '').replace('-', '')
             
-            pan = re.search(r'\b([A-Z]{5}\d{4}[A-Z])\b', text_upper)
+            pan = PAN_RE.search(text_upper)
             if pan:
                 found_ids['pan'] = pan.group(1)
         
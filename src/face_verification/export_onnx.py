@@ -0,0 +1,42 @@
+"""
+Export the DeepFace face model to ONNX and quantize it to int8 for CPU inference.
+
+Usage (from the project root):
+    pip install tf2onnx onnxruntime
+    python -m src.face_verification.export_onnx
+
+Writes models/facenet_int8.onnx (or FACE_ONNX_PATH). FaceVerifier picks it up
+automatically on the next start; delete the file to go back to TensorFlow.
+"""
+import os
+
+import tensorflow as tf
+import tf2onnx
+from deepface import DeepFace
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+from src.face_verification.face_utils import FACE_ONNX_PATH
+
+
+def export(model_name=None, output_path=FACE_ONNX_PATH):
+    model_name = model_name or os.getenv("FACE_MODEL_NAME", "Facenet")
+    client = DeepFace.build_model(model_name)
+
+    # DeepFace's input_shape is (width, height)
+    input_w, input_h = client.input_shape
+    spec = (tf.TensorSpec((None, input_h, input_w, 3), tf.float32, name="input"),)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    fp32_path = output_path.replace(".onnx", "_fp32.onnx")
+
+    print(f"[INFO] Exporting {model_name} to {fp32_path}")
+    tf2onnx.convert.from_keras(client.model, input_signature=spec, opset=13, output_path=fp32_path)
+
+    print(f"[INFO] Quantizing weights to int8 -> {output_path}")
+    quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    print("[INFO] Done.")
+
+
+if __name__ == "__main__":
+    export()
@@ -5,11 +5,53 @@ from dotenv import load_dotenv
 import numpy as np
 from deepface import DeepFace
 
+try:
+    from deepface.modules import preprocessing as df_preprocessing
+    DEEPFACE_BATCH_AVAILABLE = True
+except ImportError:
+    DEEPFACE_BATCH_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
 # Load environment variables from ../../.env (relative to this file)
 current_dir = pathlib.Path(__file__).parent.resolve()
 env_path = current_dir.parent.parent / '.env'
 load_dotenv(dotenv_path=env_path, override=True)
 
+# Optional int8-quantized ONNX export of the face model (build it with export_onnx.py).
+# When the file exists and onnxruntime is installed, embeddings run on ONNX Runtime instead of TF.
+FACE_ONNX_PATH = os.getenv("FACE_ONNX_PATH") or str(current_dir.parent.parent / 'models' / 'facenet_int8.onnx')
+# Decision thresholds, read once (the .env above is already loaded)
+LIVENESS_THRESHOLD = float(os.getenv("LIVENESS_THRESHOLD", "50.0") or 50.0)
+VERIFICATION_THRESHOLD_VERIFIED = float(os.getenv("VERIFICATION_THRESHOLD_VERIFIED", "0.75") or 0.75)
+VERIFICATION_THRESHOLD_REVIEW = float(os.getenv("VERIFICATION_THRESHOLD_REVIEW", "0.60") or 0.60)
+
+# Set FORCE_CPU=1 to keep ONNX Runtime off the GPU even when the CUDA provider is installed
+FORCE_CPU = os.getenv("FORCE_CPU", "0").lower() in ("1", "true", "yes")
+
+def release_cached_models():
+    """
+    Empties deepface's module-level model cache, which otherwise keeps the face model's
+    weights alive after every FaceVerifier is dropped. Holders of a model keep it until done.
+    """
+    try:
+        from deepface.modules import modeling
+    except ImportError:
+        return
+    cached_models = getattr(modeling, "cached_models", None)
+    if isinstance(cached_models, dict):
+        cached_models.clear()
+
+def _ort_providers():
+    """CUDA first when onnxruntime-gpu is installed (and not forced off), CPU as fallback"""
+    if not FORCE_CPU and "CUDAExecutionProvider" in ort.get_available_providers():
+        return ["CUDAExecutionProvider", "CPUExecutionProvider"]
+    return ["CPUExecutionProvider"]
+
 class FaceVerifier:
     def __init__(self):
         """
@@ -44,12 +86,35 @@ class FaceVerifier:
         except Exception as e:
             print(f"[WARNING] Model warmup failed: {e}")
 
-    def detect_face(self, image):
+        # Keep a handle on the underlying model for batched forward passes
+        self._model = None
+        if DEEPFACE_BATCH_AVAILABLE:
+            try:
+                self._model = DeepFace.build_model(self.model_name)
+            except Exception as e:
+                print(f"[WARNING] Batched embedding disabled: {e}")
+
+        # 4. Optional: ONNX Runtime backend (CUDA when available, else quantized CPU inference)
+        self._ort_session = None
+        if ORT_AVAILABLE and DEEPFACE_BATCH_AVAILABLE and os.path.exists(FACE_ONNX_PATH):
+            try:
+                options = ort.SessionOptions()
+                options.intra_op_num_threads = os.cpu_count() or 1
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                self._ort_session = ort.InferenceSession(FACE_ONNX_PATH, sess_options=options, providers=_ort_providers())
+                self._ort_input = self._ort_session.get_inputs()[0]
+                print(f"[INFO] Using ONNX Runtime face model: {FACE_ONNX_PATH} ({self._ort_session.get_providers()[0]})")
+            except Exception as e:
+                print(f"[WARNING] ONNX face model not loaded, using TensorFlow: {e}")
+                self._ort_session = None
+
+    def detect_face(self, image, gray=None):
         """
         Detects the largest face in the image using Haar Cascade.
         
         Args:
             image: BGR numpy array (OpenCV format)
+            gray: optional grayscale copy of image (reused from check_liveness)
             
         Returns:
             cropped_face: BGR numpy array of the face (or None if no face)
@@ -59,7 +124,8 @@ class FaceVerifier:
             return None
 
         # 3. Face Detection: Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # 3. Face Detection: Detect faces
         # scaleFactor=1.1, minNeighbors=5 are standard robust params
@@ -84,13 +150,14 @@ class FaceVerifier:
         
         return cropped_face
 
-    def check_liveness(self, image):
+    def check_liveness(self, image, gray=None):
         """
         Performs Liveness Detection using Laplacian Variance.
         Checks for blur/loss of texture which is common in spoofs (screens/paper).
         
         Args:
             image: BGR numpy array (full image or face crop)
+            gray: optional grayscale copy of image (shared with detect_face)
             
         Returns:
             is_live (bool): True if passes liveness check
@@ -101,7 +168,8 @@ class FaceVerifier:
             return False, 0.0
             
         # Convert to grayscale for Laplacian
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Calculate variance of Laplacian: High variance = sharp edges (Live), Low = blur (Spoof)
         laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
@@ -110,8 +178,6 @@ class FaceVerifier:
         # Real cameras usually produce sharp images > 100-300 variance.
         # Blurred screens/printed photos often drop below 50-60.
         # Setting a conservative threshold to satisfy "effective method".
-        LIVENESS_THRESHOLD = float(os.getenv("LIVENESS_THRESHOLD", "50.0") or 50.0) 
-        
         is_live = laplacian_var > LIVENESS_THRESHOLD
         
         # Normalize for display/logging (cap at 500 for 1.0)
@@ -133,6 +199,12 @@ class FaceVerifier:
         if face_image is None or face_image.size == 0:
             return None
 
+        if self._ort_session is not None:
+            try:
+                return self._run_onnx([face_image])[0]
+            except Exception as e:
+                print(f"[WARNING] ONNX embedding failed, falling back to DeepFace: {e}")
+
         try:
             # 4. Live Embedding Generation: DeepFace.represent
             results = DeepFace.represent(
@@ -152,13 +224,64 @@ class FaceVerifier:
             
         return None
 
-    def verify_with_stored_embedding(self, live_embedding, stored_embedding):
+    def _preprocess_faces(self, face_images, size):
+        """Stacks BGR face crops into one (N, rows, cols, 3) batch, preprocessed like DeepFace.represent"""
+        batch = np.concatenate([
+            df_preprocessing.resize_image(img=face[:, :, ::-1], target_size=size)
+            for face in face_images
+        ])
+        return df_preprocessing.normalize_input(img=batch, normalization="base")
+
+    def _run_onnx(self, face_images):
+        """Embeds face crops with the ONNX Runtime session; returns an (N, D) float32 array"""
+        _, rows, cols, _ = self._ort_input.shape
+        batch = self._preprocess_faces(face_images, (rows, cols)).astype(np.float32, copy=False)
+        return self._ort_session.run(None, {self._ort_input.name: batch})[0].astype(np.float32, copy=False)
+
+    def get_embeddings_batch(self, face_images):
+        """
+        Generates embeddings for several cropped faces in a single forward pass.
+        Preprocessing matches DeepFace.represent (detector_backend="skip").
+        
+        Args:
+            face_images: list of BGR numpy arrays (cropped faces)
+            
+        Returns:
+            embeddings: (N, D) float32 numpy array, or None if any face failed
+        """
+        if not face_images or any(f is None or f.size == 0 for f in face_images):
+            return None
+
+        if self._ort_session is not None:
+            try:
+                return self._run_onnx(face_images)
+            except Exception as e:
+                print(f"[WARNING] ONNX embedding failed, falling back to TensorFlow: {e}")
+
+        if self._model is not None:
+            try:
+                # DeepFace's input_shape is (width, height); resize_image expects (rows, cols)
+                input_w, input_h = self._model.input_shape
+                batch = self._preprocess_faces(face_images, (input_h, input_w))
+                embeddings = self._model.model(batch, training=False).numpy()
+                return embeddings.astype(np.float32, copy=False)
+            except Exception as e:
+                print(f"[WARNING] Batched embedding failed, falling back to per-face: {e}")
+
+        # Fallback: one DeepFace.represent call per face
+        embeddings = [self.get_embedding(face) for face in face_images]
+        if any(e is None for e in embeddings):
+            return None
+        return np.stack(embeddings)
+
+    def verify_with_stored_embedding(self, live_embedding, stored_embedding, pre_normalized=False):
         """
         Verifies a live embedding against a trusted stored embedding.
         
         Args:
             live_embedding (np.array): 128-D array from live camera
             stored_embedding (np.array): 128-D array from database
+            pre_normalized (bool): stored_embedding is already L2-normalized (saved that way at registration)
             
         Returns:
             similarity_score (float): 0.0 to 1.0 (Cosine Similarity)
@@ -169,26 +292,26 @@ class FaceVerifier:
             return 0.0, "REJECTED"
 
         # Ensure numpy arrays
-        emb1 = np.array(live_embedding)
-        emb2 = np.array(stored_embedding)
+        emb1 = np.asarray(live_embedding, dtype=np.float32)
+        emb2 = np.asarray(stored_embedding, dtype=np.float32)
 
         # 5. Face Verification Logic: Cosine Similarity
-        # similarity = dot(a, b) / (||a|| * ||b||)
+        # similarity = dot(a, b) / (||a|| * ||b||); a unit-length stored vector skips its norm
         norm1 = np.linalg.norm(emb1)
-        norm2 = np.linalg.norm(emb2)
+        norm2 = 1.0 if pre_normalized else np.linalg.norm(emb2)
         
         if norm1 == 0 or norm2 == 0:
              return 0.0, "REJECTED"
              
         # Compute cosine similarity
-        cos_sim = np.dot(emb1, emb2) / (norm1 * norm2)
+        cos_sim = float(emb1 @ emb2) / (norm1 * norm2)
         
         # Clamp value to [-1, 1] to avoid floating point errors
         cos_sim = max(-1.0, min(1.0, cos_sim))
         
         # 6. Decision Thresholds
-        verified_thresh = float(os.getenv("VERIFICATION_THRESHOLD_VERIFIED", "0.75") or 0.75)
-        review_thresh = float(os.getenv("VERIFICATION_THRESHOLD_REVIEW", "0.60") or 0.60)
+        verified_thresh = VERIFICATION_THRESHOLD_VERIFIED
+        review_thresh = VERIFICATION_THRESHOLD_REVIEW
 
         if cos_sim >= verified_thresh:
             decision = "VERIFIED"
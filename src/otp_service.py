@@ -6,6 +6,9 @@ Supports multiple SMS providers: Twilio, Generic HTTP (e.g., Fast2SMS), and Cons
 import os
 import random
 import time
+import hmac
+import hashlib
+import secrets
 import requests
 from typing import Optional, Tuple, Dict
 
@@ -29,6 +32,19 @@ def generate_otp(length: int = OTP_LENGTH) -> str:
     return "".join(str(random.randint(0, 9)) for _ in range(length))
 
 
+def generate_otp_secret() -> str:
+    """Random per-user HOTP secret (hex encoded)."""
+    return secrets.token_hex(20)
+
+
+def generate_hotp(secret: str, counter: int, length: int = OTP_LENGTH) -> str:
+    """RFC 4226 HOTP code for a hex secret and counter."""
+    digest = hmac.new(bytes.fromhex(secret), counter.to_bytes(8, 'big'), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    code = int.from_bytes(digest[offset:offset + 4], 'big') & 0x7FFFFFFF
+    return str(code % (10 ** length)).zfill(length)
+
+
 def can_send_otp(phone: str) -> Tuple[bool, str]:
     """Check rate limits."""
     key = _normalize_phone(phone)
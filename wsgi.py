@@ -0,0 +1,15 @@
+"""
+WSGI entrypoint for the Auth API.
+
+Run with Gunicorn (settings in gunicorn.conf.py):
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The gevent monkey-patch must run before anything else is imported so that
+the sockets used by pymongo, smtplib and requests become cooperative.
+"""
+from gevent import monkey
+monkey.patch_all()
+
+from src.api import app  # noqa: E402
+
+__all__ = ['app']